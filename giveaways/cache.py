@@ -0,0 +1,53 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class LookupCache:
+    """TTL cache for the third party lookups behind entry requirements.
+
+    Concurrent misses for the same key share a single fetch. Failed lookups (``None`` or an
+    exception) are not cached so the next click tries again.
+    """
+
+    def __init__(self, *, ttl: float = 300.0, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        item = self._data.get(key)
+        if item is not None and item[0] > time.monotonic():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+        task = self._inflight.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda task: self._store(key, task))
+        return await asyncio.shield(task)
+
+    def _store(self, key: Hashable, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, task.result())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
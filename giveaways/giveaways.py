@@ -1,9 +1,9 @@
 import asyncio
 import contextlib
+import heapq
 import logging
-from copy import deepcopy
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 import aiohttp
 import discord
@@ -12,12 +12,16 @@ from redbot.core.commands.converter import TimedeltaConverter
 from redbot.core.utils.chat_formatting import pagify
 from redbot.core.utils.menus import DEFAULT_CONTROLS, menu
 
+from .cache import LookupCache
 from .converter import Args
 from .menu import GiveawayButton, GiveawayView
 from .objects import Giveaway, GiveawayEnterError, GiveawayExecError
 
 log = logging.getLogger("red.flare.giveaways")
 GIVEAWAY_KEY = "giveaways"
+FLUSH_INTERVAL = 10
+FLUSH_BATCH = 500
+RETRY_DELAY = 60
 
 # TODO: Add a way to delete giveaways that have ended from the config
 
@@ -25,7 +29,7 @@ GIVEAWAY_KEY = "giveaways"
 class Giveaways(commands.Cog):
     """Giveaway Commands"""
 
-    __version__ = "1.3.2"
+    __version__ = "1.4.0"
     __author__ = "flare"
 
     def format_help_for_context(self, ctx):
@@ -37,8 +41,14 @@ class Giveaways(commands.Cog):
         self.config = Config.get_conf(self, identifier=95932766180343808)
         self.config.init_custom(GIVEAWAY_KEY, 2)
         self.giveaways = {}
+        self.pending_entrants: Dict[int, Set[int]] = {}
+        self.flush_event = asyncio.Event()
+        self.deadlines: List[Tuple[float, int]] = []
+        self.deadline_event = asyncio.Event()
         self.giveaway_bgloop = asyncio.create_task(self.init())
+        self.flush_task = asyncio.create_task(self.flush_loop())
         self.session = aiohttp.ClientSession()
+        self.lookup_cache = LookupCache()
         with contextlib.suppress(Exception):
             self.bot.add_dev_env_value("giveaways", lambda x: self)
         self.view = GiveawayView(self)
@@ -47,7 +57,7 @@ class Giveaways(commands.Cog):
     async def init(self) -> None:
         await self.bot.wait_until_ready()
         data = await self.config.custom(GIVEAWAY_KEY).all()
-        for _, guild in data.items():
+        for guildid, guild in data.items():
             for msgid, giveaway in guild.items():
                 try:
                     if giveaway.get("ended", False):
@@ -62,9 +72,16 @@ class Giveaways(commands.Cog):
                         giveaway["endtime"],
                         giveaway["prize"],
                         giveaway["emoji"],
+                        entrants=giveaway.get("entrants"),
                         **giveaway["kwargs"],
                     )
                     self.giveaways[int(msgid)] = giveaway_obj
+                    self.schedule_giveaway(giveaway_obj)
+                    if isinstance(giveaway.get("entrants"), list):
+                        # Migrate from the old list of ids, repeated once per entry.
+                        await self.config.custom(GIVEAWAY_KEY, guildid, msgid).entrants.set(
+                            giveaway_obj.entrants.to_dict()
+                        )
                     view = GiveawayView(self)
                     view.add_item(
                         GiveawayButton(
@@ -79,32 +96,103 @@ class Giveaways(commands.Cog):
                 except Exception as exc:
                     log.error(f"Error loading giveaway {msgid}: ", exc_info=exc)
         while True:
+            self.deadline_event.clear()
             try:
                 await self.check_giveaways()
             except Exception as exc:
                 log.error("Exception in giveaway loop: ", exc_info=exc)
-            await asyncio.sleep(15)
+            timeout = None
+            if self.deadlines:
+                timeout = max(self.deadlines[0][0] - datetime.now(timezone.utc).timestamp(), 0)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.deadline_event.wait(), timeout=timeout)
 
-    def cog_unload(self) -> None:
+    async def cog_unload(self) -> None:
         with contextlib.suppress(Exception):
             self.bot.remove_dev_env_value("giveaways")
         self.giveaway_bgloop.cancel()
-        asyncio.create_task(self.session.close())
+        self.flush_task.cancel()
+        # Let an interrupted flush put its batch back before the final one runs.
+        await asyncio.gather(self.giveaway_bgloop, self.flush_task, return_exceptions=True)
+        await self.flush_all_entrants()
+        await self.session.close()
+
+    def queue_entrant(self, giveaway: Giveaway, userid: int) -> None:
+        """Mark a user's entries as changed, they are saved by the next flush."""
+        pending = self.pending_entrants.setdefault(giveaway.messageid, set())
+        pending.add(userid)
+        if len(pending) >= FLUSH_BATCH:
+            self.flush_event.set()
+
+    async def flush_entrants(self, giveaway: Giveaway) -> None:
+        """Save the queued entrant changes of a giveaway in a single write."""
+        userids = self.pending_entrants.pop(giveaway.messageid, None)
+        if not userids:
+            return
+        value = self.config.custom(
+            GIVEAWAY_KEY, str(giveaway.guildid), str(giveaway.messageid)
+        ).entrants
+        try:
+            if isinstance(await value(), list):
+                # Giveaways that ended before the upgrade were never migrated by init.
+                await value.set(giveaway.entrants.to_dict())
+                return
+            async with value() as entrants:
+                for userid in userids:
+                    weight = giveaway.entrants.get(userid)
+                    if weight:
+                        entrants[str(userid)] = weight
+                    else:
+                        entrants.pop(str(userid), None)
+        except BaseException:
+            # Also on cancellation, so the flush in cog_unload still has these to write.
+            self.pending_entrants.setdefault(giveaway.messageid, set()).update(userids)
+            raise
+
+    async def flush_all_entrants(self) -> None:
+        for msgid in list(self.pending_entrants):
+            giveaway = self.giveaways.get(msgid)
+            if giveaway is None:
+                del self.pending_entrants[msgid]
+                continue
+            try:
+                await self.flush_entrants(giveaway)
+            except Exception as exc:
+                log.error(f"Error saving entrants of giveaway {msgid}: ", exc_info=exc)
+
+    async def flush_loop(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.flush_event.wait(), timeout=FLUSH_INTERVAL)
+            self.flush_event.clear()
+            await self.flush_all_entrants()
+
+    def schedule_giveaway(self, giveaway: Giveaway) -> None:
+        """Add a giveaway's end time to the schedule and wake the loop to pick it up."""
+        heapq.heappush(self.deadlines, (giveaway.endtime.timestamp(), giveaway.messageid))
+        self.deadline_event.set()
 
     async def check_giveaways(self) -> None:
-        to_clear = []
-        giveaways = deepcopy(self.giveaways)
-        for msgid, giveaway in giveaways.items():
-            if giveaway.endtime < datetime.now(timezone.utc):
+        now = datetime.now(timezone.utc).timestamp()
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, msgid = heapq.heappop(self.deadlines)
+            giveaway = self.giveaways.get(msgid)
+            # Ended or rescheduled giveaways leave stale entries behind, they are skipped here.
+            if giveaway is None or giveaway.endtime.timestamp() > deadline:
+                continue
+            try:
                 await self.draw_winner(giveaway)
-                to_clear.append(msgid)
-                gw = await self.config.custom(GIVEAWAY_KEY, giveaway.guildid, str(msgid)).all()
-                gw["ended"] = True
-                await self.config.custom(GIVEAWAY_KEY, giveaway.guildid, str(msgid)).set(gw)
-        for msgid in to_clear:
-            del self.giveaways[msgid]
+            except Exception as exc:
+                log.error(f"Error ending giveaway {msgid}, retrying: ", exc_info=exc)
+                heapq.heappush(self.deadlines, (now + RETRY_DELAY, msgid))
+                continue
+            self.giveaways.pop(msgid, None)
+            gw = await self.config.custom(GIVEAWAY_KEY, giveaway.guildid, str(msgid)).all()
+            gw["ended"] = True
+            await self.config.custom(GIVEAWAY_KEY, giveaway.guildid, str(msgid)).set(gw)
 
     async def draw_winner(self, giveaway: Giveaway):
+        await self.flush_entrants(giveaway)
         guild = self.bot.get_guild(giveaway.guildid)
         if guild is None:
             return
@@ -113,6 +201,10 @@ class Giveaways(commands.Cog):
             return
 
         winners = giveaway.draw_winner()
+        # Winners are removed from the stored entrants so a reroll picks someone else.
+        for winner in winners or []:
+            self.queue_entrant(giveaway, winner)
+        await self.flush_entrants(giveaway)
         winner_objs = None
         if winners is None:
             txt = "Not enough entries to roll the giveaway."
@@ -142,10 +234,6 @@ class Giveaways(commands.Cog):
             await msg.edit(content="🎉 Giveaway Ended 🎉", embed=embed, view=None)
         except (discord.NotFound, discord.Forbidden) as exc:
             log.error("Error editing giveaway message: ", exc_info=exc)
-            async with self.config.custom(
-                GIVEAWAY_KEY, giveaway.guildid, int(giveaway.messageid)
-            ).entrants() as entrants:
-                entrants = [x for x in entrants if x != winner]
             del self.giveaways[giveaway.messageid]
             gw = await self.config.custom(
                 GIVEAWAY_KEY, giveaway.guildid, str(giveaway.messageid)
@@ -178,10 +266,6 @@ class Giveaways(commands.Cog):
                         await winner.send(
                             f"Congratulations! You won {giveaway.prize} in the giveaway on {guild}!"
                         )
-            async with self.config.custom(
-                GIVEAWAY_KEY, giveaway.guildid, int(giveaway.messageid)
-            ).entrants() as entrants:
-                entrants = [x for x in entrants if x != winner]
         return
 
     @commands.hybrid_group(aliases=["gw"])
@@ -245,8 +329,8 @@ class Giveaways(commands.Cog):
         if ctx.interaction:
             await ctx.send("Giveaway created!", ephemeral=True)
         self.giveaways[msg.id] = giveaway_obj
-        giveaway_dict = deepcopy(giveaway_obj.__dict__)
-        giveaway_dict["endtime"] = giveaway_dict["endtime"].timestamp()
+        self.schedule_giveaway(giveaway_obj)
+        giveaway_dict = giveaway_obj.to_dict()
         await self.config.custom(GIVEAWAY_KEY, str(ctx.guild.id), str(msg.id)).set(giveaway_dict)
 
     @giveaway.command()
@@ -373,8 +457,8 @@ class Giveaways(commands.Cog):
             },
         )
         self.giveaways[msg.id] = giveaway_obj
-        giveaway_dict = deepcopy(giveaway_obj.__dict__)
-        giveaway_dict["endtime"] = giveaway_dict["endtime"].timestamp()
+        self.schedule_giveaway(giveaway_obj)
+        giveaway_dict = giveaway_obj.to_dict()
         del giveaway_dict["kwargs"]["colour"]
         await self.config.custom(GIVEAWAY_KEY, str(ctx.guild.id), str(msg.id)).set(giveaway_dict)
 
@@ -388,14 +472,8 @@ class Giveaways(commands.Cog):
         giveaway = self.giveaways[msgid]
         if not giveaway.entrants:
             return await ctx.send("No entrants.")
-        count = {}
-        for entrant in giveaway.entrants:
-            if entrant not in count:
-                count[entrant] = 1
-            else:
-                count[entrant] += 1
         msg = ""
-        for userid, count_int in count.items():
+        for userid, count_int in giveaway.entrants.items():
             user = ctx.guild.get_member(userid)
             msg += f"{user.mention} ({count_int})\n" if user else f"<{userid}> ({count_int})\n"
         embeds = []
@@ -403,7 +481,7 @@ class Giveaways(commands.Cog):
             embed = discord.Embed(
                 title="Entrants", description=page, color=await ctx.embed_color()
             )
-            embed.set_footer(text=f"Total entrants: {len(count)}")
+            embed.set_footer(text=f"Total entrants: {len(giveaway.entrants)}")
             embeds.append(embed)
 
         if len(embeds) == 1:
@@ -467,7 +545,6 @@ class Giveaways(commands.Cog):
 
         msg = """
         Giveaway advanced creation.
-        NOTE: Giveaways are checked every 20 seconds, this means that the giveaway may end up being slightly longer than the specified duration.
 
         Giveaway advanced contains many different flags that can be used to customize the giveaway.
         The flags are as follows:
@@ -546,10 +623,11 @@ class Giveaways(commands.Cog):
                     giveaway.kwargs[flag] = [x.id for x in flags[flag]]
                 else:
                     giveaway.kwargs[flag] = flags[flag]
+        giveaway.update_roles()
         giveaway.endtime = datetime.now(timezone.utc) + giveaway.duration
         self.giveaways[msgid] = giveaway
-        giveaway_dict = deepcopy(giveaway.__dict__)
-        giveaway_dict["endtime"] = giveaway_dict["endtime"].timestamp()
+        self.schedule_giveaway(giveaway)
+        giveaway_dict = giveaway.to_dict()
         giveaway_dict["duration"] = giveaway_dict["duration"].total_seconds()
         del giveaway_dict["kwargs"]["colour"]
         await self.config.custom(GIVEAWAY_KEY, ctx.guild.id, str(msgid)).set(giveaway_dict)
@@ -594,6 +672,8 @@ class Giveaways(commands.Cog):
                 For any integration suggestions, suggest them via the [#support-flare-cogs](https://discord.gg/GET4DVk) channel on the support server or [flare-cogs](https://github.com/flaree/flare-cogs/issues/new/choose) github.""".format(
                 prefix=ctx.clean_prefix
             )
+            cache = self.lookup_cache
+            msg += f"\n\n**Lookup cache:** {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.0%} hit rate)"
 
         embed = discord.Embed(
             title="3rd Party Integrations", description=msg, color=await ctx.embed_color()
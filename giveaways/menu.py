@@ -46,7 +46,10 @@ class GiveawayButton(Button):
             await interaction.response.defer()
             try:
                 await giveaway.add_entrant(
-                    interaction.user, bot=self.cog.bot, session=self.cog.session
+                    interaction.user,
+                    bot=self.cog.bot,
+                    session=self.cog.session,
+                    cache=self.cog.lookup_cache,
                 )
             except GiveawayEnterError as e:
                 await interaction.followup.send(e.message, ephemeral=True)
@@ -69,9 +72,7 @@ class GiveawayButton(Button):
             await self.update_label(giveaway, interaction)
 
     async def update_entrant(self, giveaway, interaction):
-        await self.cog.config.custom(
-            "giveaways", interaction.guild_id, interaction.message.id
-        ).entrants.set(self.cog.giveaways[interaction.message.id].entrants)
+        self.cog.queue_entrant(giveaway, interaction.user.id)
 
     async def update_label(self, giveaway, interaction):
         if self.update:
@@ -1,12 +1,16 @@
+import heapq
 import math
 import random
+from copy import deepcopy
 from datetime import datetime, timezone
 from logging import getLogger
-from typing import Tuple
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 import discord
 from redbot.core import bank
 
+from .cache import LookupCache
+
 log = getLogger("red.flare.giveaways")
 
 
@@ -27,6 +31,71 @@ class AlreadyEnteredError(GiveawayError):
     pass
 
 
+class RoleRequirements(NamedTuple):
+    required: FrozenSet[int]
+    blacklist: FrozenSet[int]
+    bypass: FrozenSet[int]
+    multi: FrozenSet[int]
+
+
+class Entrants:
+    """Giveaway entrants mapped to their number of entries.
+
+    Membership, entry and removal are O(1). Older configs stored a flat list of ids with one
+    item per entry, both forms are accepted.
+    """
+
+    __slots__ = ("_entries", "total")
+
+    def __init__(self, data=None) -> None:
+        self._entries: Dict[int, int] = {}
+        self.total = 0
+        if isinstance(data, Entrants):
+            data = data._entries
+        if isinstance(data, dict):
+            for userid, weight in data.items():
+                self.add(int(userid), weight)
+        elif data:
+            for userid in data:
+                self.add(int(userid))
+
+    def __contains__(self, userid: int) -> bool:
+        return userid in self._entries
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, userid: int) -> int:
+        return self._entries.get(userid, 0)
+
+    def items(self):
+        return self._entries.items()
+
+    def add(self, userid: int, weight: int = 1) -> None:
+        self._entries[userid] = self._entries.get(userid, 0) + weight
+        self.total += weight
+
+    def remove(self, userid: int) -> int:
+        weight = self._entries.pop(userid, 0)
+        self.total -= weight
+        return weight
+
+    def draw(self, amount: int) -> List[int]:
+        """Draw ``amount`` distinct users, weighted by their entries."""
+        # Efraimidis-Spirakis weighted sampling without replacement.
+        return heapq.nlargest(
+            amount,
+            self._entries,
+            key=lambda userid: random.random() ** (1 / self._entries[userid]),
+        )
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(userid): weight for userid, weight in self._entries.items()}
+
+
 class Giveaway:
     def __init__(
         self,
@@ -45,30 +114,35 @@ class Giveaway:
         self.messageid = messageid
         self.endtime = endtime
         self.prize = prize
-        self.entrants = entrants or []
+        self.entrants = Entrants(entrants)
         self.emoji = emoji
         self.kwargs = kwargs
+        self.update_roles()
+
+    def update_roles(self) -> None:
+        """Precompute the role requirements, to be called whenever the kwargs change."""
+        self.role_ids = RoleRequirements(
+            *(
+                frozenset(int(role) for role in self.kwargs.get(key) or [])
+                for key in ("roles", "blacklist", "bypass-roles", "multi-roles")
+            )
+        )
 
     async def add_entrant(
-        self, user: discord.Member, *, bot, session
+        self, user: discord.Member, *, bot, session, cache: LookupCache
     ) -> Tuple[bool, GiveawayError]:
         if not self.kwargs.get("multientry", False) and user.id in self.entrants:
             self.remove_entrant(user.id)
             raise AlreadyEnteredError("You have already entered this giveaway.")
-        bypass = self.does_entrant_bypass(user)
+        roles = {role.id for role in user.roles}
+        bypass = self.does_entrant_bypass(user, roles)
         if bypass is False:
-            if self.kwargs.get("roles", []) and all(
-                int(role) not in [x.id for x in user.roles]
-                for role in self.kwargs.get("roles", [])
-            ):
+            if self.role_ids.required and self.role_ids.required.isdisjoint(roles):
                 raise GiveawayEnterError(
                     "You do not have the required roles to join this giveaway."
                 )
 
-            if self.kwargs.get("blacklist", []) and any(
-                int(role) in [x.id for x in user.roles]
-                for role in self.kwargs.get("blacklist", [])
-            ):
+            if not self.role_ids.blacklist.isdisjoint(roles):
                 raise GiveawayEnterError("Your role is blacklisted from this giveaway.")
             if (
                 self.kwargs.get("joined", None) is not None
@@ -99,7 +173,9 @@ class Giveaway:
                 cog = bot.get_cog("Leveler")
                 if cog is None:
                     raise GiveawayExecError("The Leveler cog is not installed.")
-                userinfo = await cog.db.users.find_one({"user_id": str(user.id)})
+                userinfo = await cache.get(
+                    ("leveler", user.id), lambda: cog.db.users.find_one({"user_id": str(user.id)})
+                )
                 lvl = userinfo.get("servers", {}).get(str(self.guildid), {}).get("level", 0)
                 if lvl <= self.kwargs.get("levelreq", 0):
                     raise GiveawayEnterError(
@@ -110,7 +186,9 @@ class Giveaway:
                 cog = bot.get_cog("Leveler")
                 if cog is None:
                     raise GiveawayExecError("The Leveler cog is not installed.")
-                userinfo = await cog.db.users.find_one({"user_id": str(user.id)})
+                userinfo = await cache.get(
+                    ("leveler", user.id), lambda: cog.db.users.find_one({"user_id": str(user.id)})
+                )
                 lvl = userinfo.get("servers", {}).get(str(self.guildid), {}).get("rep", 0)
                 if lvl <= self.kwargs.get("levelreq", 0):
                     raise GiveawayEnterError(
@@ -118,22 +196,24 @@ class Giveaway:
                     )
 
             if self.kwargs.get("mee6_level", None) is not None:
-                lb = await get_mee6lb(session, self.guildid)
-                if lb is None:
+                levels = await cache.get(
+                    ("mee6", self.guildid), lambda: get_mee6_levels(session, self.guildid)
+                )
+                if levels is None:
                     raise GiveawayExecError("The MEE6 Leaderboard is not available.")
-                for user in lb:
-                    if user["id"] == str(user.id) and user["level"] < self.kwargs.get(
-                        "mee6-level", 0
-                    ):
-                        raise GiveawayEnterError(
-                            f"You do not meet the required MEE6 level to join this giveaway. You must be level {self.kwargs['mee6-level']} or higher."
-                        )
+                if levels.get(user.id, 0) < self.kwargs["mee6_level"]:
+                    raise GiveawayEnterError(
+                        f"You do not meet the required MEE6 level to join this giveaway. You must be level {self.kwargs['mee6_level']} or higher."
+                    )
 
             if self.kwargs.get("tatsu_level", None) is not None:
                 token = await bot.get_shared_api_tokens("tatsumaki")
                 if token.get("authorization") is None:
                     raise GiveawayExecError("The Tatsu token is not set.")
-                uinfo = await get_tatsuinfo(session, token.get("authorization"), user.id)
+                uinfo = await cache.get(
+                    ("tatsu", user.id),
+                    lambda: get_tatsuinfo(session, token.get("authorization"), user.id),
+                )
                 if uinfo is None:
                     raise GiveawayEnterError(
                         "The Tatsu API did not return any data therefore you have not been entered."
@@ -146,10 +226,13 @@ class Giveaway:
                     )
 
             if self.kwargs.get("tatsu_rep", None) is not None:
-                token = bot.get_shared_api_tokens("tatsumaki")
+                token = await bot.get_shared_api_tokens("tatsumaki")
                 if token.get("authorization") is None:
                     raise GiveawayExecError("The Tatsu token is not set.")
-                uinfo = await get_tatsuinfo(session, token.get("authorization"), user.id)
+                uinfo = await cache.get(
+                    ("tatsu", user.id),
+                    lambda: get_tatsuinfo(session, token.get("authorization"), user.id),
+                )
                 if uinfo is None:
                     raise GiveawayEnterError(
                         "The Tatsu API did not return any data therefore you have not been entered."
@@ -160,11 +243,14 @@ class Giveaway:
                     )
 
             if self.kwargs.get("amari_level", None) is not None:
-                token = bot.get_shared_api_tokens("amari")
+                token = await bot.get_shared_api_tokens("amari")
                 if token.get("authorization") is None:
                     raise GiveawayExecError("The Amari token is not set.")
-                uinfo = await get_amari_info(
-                    session, token.get("authorization"), user.id, self.guildid
+                uinfo = await cache.get(
+                    ("amari", self.guildid, user.id),
+                    lambda: get_amari_info(
+                        session, token.get("authorization"), user.id, self.guildid
+                    ),
                 )
                 if uinfo is None:
                     raise GiveawayEnterError(
@@ -176,11 +262,14 @@ class Giveaway:
                     )
 
             if self.kwargs.get("amari_weekly_xp", None) is not None:
-                token = bot.get_shared_api_tokens("amari")
+                token = await bot.get_shared_api_tokens("amari")
                 if token.get("authorization") is None:
                     raise GiveawayExecError("The Amari token is not set.")
-                uinfo = await get_amari_info(
-                    session, token.get("authorization"), user.id, self.guildid
+                uinfo = await cache.get(
+                    ("amari", self.guildid, user.id),
+                    lambda: get_amari_info(
+                        session, token.get("authorization"), user.id, self.guildid
+                    ),
                 )
                 if uinfo is None:
                     raise GiveawayEnterError(
@@ -191,43 +280,44 @@ class Giveaway:
                         f"You do not meet the required Amari weekly XP to join this giveaway. You must have {self.kwargs['amari_weekly_xp']} or higher."
                     )
 
-        self.entrants.append(user.id)
-        if self.kwargs.get("multi", None) is not None and any(
-            int(role) in [x.id for x in user.roles] for role in self.kwargs.get("multi-roles", [])
+        weight = 1
+        if self.kwargs.get("multi", None) is not None and not self.role_ids.multi.isdisjoint(
+            roles
         ):
-            for _ in range(self.kwargs["multi"] - 1):
-                self.entrants.append(user.id)
+            weight = max(self.kwargs["multi"], 1)
+        self.entrants.add(user.id, weight)
         return
 
     def remove_entrant(self, userid: int) -> None:
-        self.entrants = [x for x in self.entrants if x != userid]
+        self.entrants.remove(userid)
 
-    def draw_winner(self) -> int:
+    def draw_winner(self) -> List[int]:
         winners = self.kwargs.get("winners") or 1
         if len(self.entrants) < winners:
             return None
-        winner = random.sample(self.entrants, winners)
-        self.remove_entrant(winner)
+        winner = self.entrants.draw(winners)
+        for userid in winner:
+            self.remove_entrant(userid)
         return winner
 
-    def does_entrant_bypass(self, user: discord.Member) -> bool:
-        if not self.kwargs.get("bypass-roles", []):
+    def to_dict(self) -> dict:
+        data = deepcopy(
+            {k: v for k, v in self.__dict__.items() if k not in ("entrants", "role_ids")}
+        )
+        data["entrants"] = self.entrants.to_dict()
+        data["endtime"] = self.endtime.timestamp()
+        return data
+
+    def does_entrant_bypass(self, user: discord.Member, roles: Optional[Set[int]] = None) -> bool:
+        if not self.role_ids.bypass:
             return False
+        if roles is None:
+            roles = {role.id for role in user.roles}
         bypass_type = self.kwargs.get("bypass-type")
         if bypass_type == "or":
-            return any(
-                list(
-                    int(role) in [x.id for x in user.roles]
-                    for role in self.kwargs.get("bypass-roles")
-                )
-            )
+            return not self.role_ids.bypass.isdisjoint(roles)
         elif bypass_type == "and":
-            return all(
-                list(
-                    int(role) in [x.id for x in user.roles]
-                    for role in self.kwargs.get("bypass-roles")
-                )
-            )
+            return self.role_ids.bypass <= roles
         else:
             return False
 
@@ -245,6 +335,13 @@ async def get_mee6lb(session, guild):
         return data["players"]
 
 
+async def get_mee6_levels(session, guild):
+    lb = await get_mee6lb(session, guild)
+    if lb is None:
+        return None
+    return {int(player["id"]): player["level"] for player in lb}
+
+
 async def get_tatsuinfo(session, token, userid):
     async with session.get(
         f"https://api.tatsu.gg/v1/users/{userid}/profile", headers={"Authorization": token}
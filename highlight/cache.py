@@ -0,0 +1,39 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire ``ttl`` seconds after being set."""
+
+    def __init__(self, *, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import discord
+
+logger = logging.getLogger("red.flare.highlight")
+
+# Hits coalesced per member, also the number of embeds Discord allows in one message. The
+# batch is split over several DMs when it would go over the text limits below.
+MAX_BATCH = 10
+MAX_CONTENT = 2000
+MAX_EMBED_TEXT = 6000  # Combined text of every embed in a message.
+
+
+class DeliveryQueue:
+    """Bounded background queue for highlight DMs.
+
+    Hits for the same member that arrive within ``window`` seconds of the first one are
+    coalesced into a single DM. Nothing here is awaited from the message listener.
+    """
+
+    def __init__(
+        self,
+        on_delivered: Callable[[discord.Member], None],
+        *,
+        workers: int = 4,
+        maxsize: int = 1000,
+        window: float = 2.0,
+    ):
+        self.window = window
+        self.on_delivered = on_delivered
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._pending: Dict[int, List[Tuple[str, Awaitable[discord.Embed]]]] = {}
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def average_latency(self) -> float:
+        sent = self.delivered + self.failed
+        return self.total_latency / sent if sent else 0.0
+
+    def submit(
+        self, member: discord.Member, content: str, context: Awaitable[discord.Embed]
+    ) -> bool:
+        """Queue a highlight for ``member``, returns False if it had to be dropped."""
+        batch = self._pending.get(member.id)
+        if batch is not None:
+            if len(batch) >= MAX_BATCH:
+                self.dropped += 1
+                return False
+            batch.append((content, context))
+            self.coalesced += 1
+            return True
+        try:
+            self._queue.put_nowait((member, time.monotonic()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._pending[member.id] = [(content, context)]
+        return True
+
+    def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._pending.clear()
+
+    async def _worker(self):
+        while True:
+            member, queued = await self._queue.get()
+            try:
+                delay = queued + self.window - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                batch = self._pending.pop(member.id, None)
+                if batch:
+                    await self._deliver(member, batch)
+                    latency = time.monotonic() - queued
+                    self.total_latency += latency
+                    self.max_latency = max(self.max_latency, latency)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error delivering highlights to %s", member.id)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, member: discord.Member, batch):
+        messages: List[Tuple[str, List[discord.Embed], int]] = []
+        for text, context in batch:
+            try:
+                embed = await context
+            except discord.HTTPException as e:
+                logger.debug("Failed to fetch highlight context: %s", e)
+                continue
+            if messages:
+                content, embeds, size = messages[-1]
+                if (
+                    len(content) + len(text) <= MAX_CONTENT
+                    and size + len(embed) <= MAX_EMBED_TEXT
+                    and len(embeds) < MAX_BATCH
+                ):
+                    embeds.append(embed)
+                    messages[-1] = (content + text, embeds, size + len(embed))
+                    continue
+            messages.append((text, [embed], len(embed)))
+        sent = False
+        for content, embeds, _ in messages:
+            try:
+                await member.send(content, embeds=embeds)
+            except discord.HTTPException as e:
+                logger.debug("Failed to send highlight to %s: %s", member.id, e)
+            else:
+                sent = True
+        if not sent:
+            self.failed += 1
+            return
+        self.delivered += 1
+        self.on_delivered(member)
@@ -1,10 +1,9 @@
 import asyncio
 import logging
-import re
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Literal, Optional
+from typing import Literal, Optional, Sequence
 
 import discord
 import tabulate
@@ -14,8 +13,18 @@ from redbot.core.utils.menus import DEFAULT_CONTROLS, menu
 from redbot.core.utils.mod import is_mod_or_superior
 from redbot.core.utils.predicates import MessagePredicate
 
+from .cache import TTLCache
+from .delivery import DeliveryQueue
+from .matcher import EMPTY_MATCHER, HighlightMatcher
+
 logger = logging.getLogger("red.flare.highlight")
 
+CONTEXT_SIZE = 5
+CONSISTENCY_INTERVAL = 3600
+
+DEFAULT_MEMBER = {"blacklist": [], "whitelist": [], "cooldown": 60, "channel_blacklist": []}
+DEFAULT_CHANNEL = {"highlight": {}}
+
 
 def chunks(l, n):
     """Yield successive n-sized chunks from l."""
@@ -45,17 +54,26 @@ class Highlight(commands.Cog):
             colour=discord.Color.red().value,
             restricted=False,
         )
-        self.config.register_member(blacklist=[], whitelist=[], cooldown=60, channel_blacklist=[])
-        default_channel = {"highlight": {}}
-        self.config.register_channel(**default_channel)
-        self.config.register_guild(**default_channel)
+        self.config.register_member(**DEFAULT_MEMBER)
+        self.config.register_channel(**DEFAULT_CHANNEL)
+        self.config.register_guild(**DEFAULT_CHANNEL)
         self.highlightcache = {}
         self.member_cache = {}
         self.cooldowns = {}
-        self.recache = {}
+        self.views = {}
+        self.recent_messages = {}
         self.guildcache = {}
         self.global_conf = {}
         self.cooldown = 60
+        self.delivery = DeliveryQueue(self.mark_notified)
+        self.auth_cache = TTLCache()
+        self.view_guilds = {}
+        self.consistency_task = None
+
+    def cog_unload(self):
+        self.delivery.close()
+        if self.consistency_task:
+            self.consistency_task.cancel()
 
     async def red_get_data_for_user(self, *, user_id: int):
         config = await self.config.all_channels()
@@ -80,9 +98,9 @@ class Highlight(commands.Cog):
         for channel in data:
             async with self.config.channel_from_id(channel).highlight() as highlight:
                 del highlight[str(user_id)]
-        await self.generate_cache()
+            await self.refresh_channel(channel)
 
-    __version__ = "1.11.1"
+    __version__ = "1.12.0"
     __author__ = "flare#0001"
 
     def format_help_for_context(self, ctx: commands.Context):
@@ -93,6 +111,7 @@ class Highlight(commands.Cog):
     async def initalize(self):
         await self.migrate_config()
         await self.generate_cache()
+        self.consistency_task = asyncio.create_task(self.consistency_loop())
 
     async def generate_cache(self):
         self.cooldown = await self.config.default_cooldown()
@@ -100,6 +119,68 @@ class Highlight(commands.Cog):
         self.highlightcache = await self.config.all_channels()
         self.member_cache = await self.config.all_members()
         self.guildcache = await self.config.all_guilds()
+        self.views = {}
+        self.view_guilds = {}
+        self.auth_cache.clear()
+
+    async def refresh_global(self):
+        self.global_conf = await self.config.all()
+        self.cooldown = self.global_conf["default_cooldown"]
+        self.auth_cache.clear()
+
+    async def refresh_channel(self, channel_id: int):
+        self.highlightcache[channel_id] = await self.config.channel_from_id(channel_id).all()
+        self.views.pop(channel_id, None)
+
+    async def refresh_guild(self, guild_id: int):
+        self.guildcache[guild_id] = await self.config.guild_from_id(guild_id).all()
+        for channel_id in self.view_guilds.pop(guild_id, ()):
+            self.views.pop(channel_id, None)
+
+    async def refresh_member(self, guild_id: int, member_id: int):
+        self.member_cache.setdefault(guild_id, {})[member_id] = await self.config.member_from_ids(
+            guild_id, member_id
+        ).all()
+
+    async def consistency_loop(self):
+        while True:
+            await asyncio.sleep(CONSISTENCY_INTERVAL)
+            try:
+                await self.check_consistency()
+            except Exception:
+                logger.exception("Error checking highlight cache consistency")
+
+    async def check_consistency(self):
+        """Compare the incremental caches against Config and refresh any entries that drifted."""
+        channels = await self.config.all_channels()
+        guilds = await self.config.all_guilds()
+        members = {
+            (guild_id, member_id): data
+            for guild_id, guild_members in (await self.config.all_members()).items()
+            for member_id, data in guild_members.items()
+        }
+        cached_members = {
+            (guild_id, member_id): data
+            for guild_id, guild_members in self.member_cache.items()
+            for member_id, data in guild_members.items()
+        }
+        stale_channels = drifted(self.highlightcache, channels, DEFAULT_CHANNEL)
+        stale_guilds = drifted(self.guildcache, guilds, DEFAULT_CHANNEL)
+        stale_members = drifted(cached_members, members, DEFAULT_MEMBER)
+        if not (stale_channels or stale_guilds or stale_members):
+            return
+        logger.warning(
+            "Highlight cache drifted from config for %s channels, %s guilds and %s members.",
+            len(stale_channels),
+            len(stale_guilds),
+            len(stale_members),
+        )
+        for channel_id in stale_channels:
+            await self.refresh_channel(channel_id)
+        for guild_id in stale_guilds:
+            await self.refresh_guild(guild_id)
+        for guild_id, member_id in stale_members:
+            await self.refresh_member(guild_id, member_id)
 
     async def migrate_config(self):
         if await self.config.migrated():
@@ -127,130 +208,193 @@ class Highlight(commands.Cog):
         await self.config.migrated.set(True)
         logger.info("Migration complete.")
 
+    def build_view(self, channel_id: int, guild_id: int) -> HighlightMatcher:
+        """Merge channel and guild highlights into an immutable per-channel view.
+
+        Channels without any subscribers share a single empty view. Views are dropped by
+        the refresh methods whenever the channel or guild highlights change.
+        """
+        highlighted_dict = defaultdict(dict)
+        for d in (
+            self.highlightcache.get(channel_id, {}).get("highlight", {}),
+            self.guildcache.get(guild_id, {}).get("highlight", {}),
+        ):
+            for user, words in d.items():
+                highlighted_dict[user].update(words)
+        view = HighlightMatcher(highlighted_dict) if highlighted_dict else EMPTY_MATCHER
+        if not view:
+            # Messages aren't buffered without subscribers, what is left would go stale.
+            self.recent_messages.pop(channel_id, None)
+        self.views[channel_id] = view
+        self.view_guilds.setdefault(guild_id, set()).add(channel_id)
+        return view
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if isinstance(message.channel, discord.abc.PrivateChannel):
             return
+        matcher = self.views.get(message.channel.id)
+        if matcher is None:
+            matcher = self.build_view(message.channel.id, message.guild.id)
+        if not matcher:
+            return
+        recent = self.recent_messages.get(message.channel.id)
+        if recent is None:
+            recent = self.recent_messages[message.channel.id] = deque(maxlen=CONTEXT_SIZE)
+        previous = tuple(recent)
+        recent.append(message)
         if await self.bot.cog_disabled_in_guild(self, message.guild):
             return
-        highlight, highlightguild = (
-            self.highlightcache.get(message.channel.id),
-            self.guildcache.get(message.guild.id),
-        )
-        # highlight_guild = self.guildcache.get(message.guild.id)
-        if highlight is None:
-            highlight = {}
-        if highlightguild is None:
-            highlightguild = {}
-        highlight_guild = highlightguild.get("highlight", {})
-        highlight = highlight.get("highlight", {})
-        highlighted_dict = defaultdict(dict)
-        for d in (highlight, highlight_guild):
-            for key, value in d.items():
-                for val in value:
-                    highlighted_dict[key][val] = value[val]
-        for user in highlighted_dict:
-            if int(user) == message.author.id:
+        content = message.content
+        if message.author.bot:
+            if not matcher.bots:
+                return
+            if message.embeds:
+                content = "\n".join(
+                    text
+                    for embed in message.embeds
+                    for text in (embed.description, *(field.value for field in embed.fields))
+                    if text
+                )
+        hits = matcher.search(content.lower(), bot=message.author.bot)
+        context = None
+        for user, highlighted_words in hits.items():
+            if user == message.author.id:
                 continue
-            if self.global_conf.get("restricted") and not await is_mod_or_superior(
-                self.bot, message.guild.get_member(int(user))
-            ):
+            highlighted_usr = message.guild.get_member(user)
+            if highlighted_usr is None:
                 continue
-            if self.cooldowns.get(int(user)):
-                seconds = (
-                    datetime.now(tz=timezone.utc) - self.cooldowns[int(user)]
-                ).total_seconds()
+            if self.cooldowns.get(user):
+                seconds = (datetime.now(tz=timezone.utc) - self.cooldowns[user]).total_seconds()
                 cooldown = (
                     self.member_cache.get(message.guild.id, {})
-                    .get(int(user), {})
+                    .get(user, {})
                     .get("cooldown", self.cooldown)
                 )
                 if cooldown < self.cooldown:
                     cooldown = self.cooldown
                 if seconds < cooldown:
                     continue
-            if self.member_cache.get(message.guild.id, False) and self.member_cache[
-                message.guild.id
-            ].get(int(user), False):
-                if (
-                    self.member_cache[message.guild.id][int(user)]["whitelist"]
-                    and message.author.id
-                    not in self.member_cache[message.guild.id][int(user)]["whitelist"]
-                ):
+            member_conf = self.member_cache.get(message.guild.id, {}).get(user)
+            if member_conf:
+                if member_conf["whitelist"] and message.author.id not in member_conf["whitelist"]:
                     continue
-                elif (
-                    self.member_cache[message.guild.id][int(user)]["blacklist"]
-                    and message.author.id
-                    in self.member_cache[message.guild.id][int(user)]["blacklist"]
-                ):
+                elif member_conf["blacklist"] and message.author.id in member_conf["blacklist"]:
                     continue
                 elif (
-                    self.member_cache[message.guild.id][int(user)]["channel_blacklist"]
-                    and message.channel.id
-                    in self.member_cache[message.guild.id][int(user)]["channel_blacklist"]
+                    member_conf["channel_blacklist"]
+                    and message.channel.id in member_conf["channel_blacklist"]
                 ):
                     continue
-            highlighted_words = []
-            for word in highlighted_dict[user]:
-                if not highlighted_dict[user][word]["toggle"]:
-                    continue
-                if word in highlighted_words:
-                    continue
+            if not await self.can_notify(highlighted_usr, message.channel):
+                continue
 
-                highlighted_usr = message.guild.get_member(int(user))
-                if highlighted_usr is None:
-                    continue
-                if not await self.bot.allowed_by_whitelist_blacklist(highlighted_usr):
-                    continue
-                if not message.channel.permissions_for(highlighted_usr).read_messages:
-                    continue
-                content = message.content.lower()
-                if message.author.bot:
-                    if not highlighted_dict[user][word]["bots"]:
-                        continue
-                    if message.embeds:
-                        content = ""
-                        for embed in message.embeds:
-                            content += embed.description or ""
-                            for field in embed.fields:
-                                content += field.value or ""
-
-                if highlighted_dict[user][word].get("boundary", False):
-                    if word.lower() in self.recache:
-                        pattern = self.recache[word.lower()]
-                    else:
-                        pattern = re.compile(rf"\b{re.escape(word.lower())}\b", flags=re.I)
-                        self.recache[word.lower()] = pattern
-                    if set(pattern.findall(content)):
-                        highlighted_words.append(word)
-                elif word.lower() in content:
-                    highlighted_words.append(word)
-            if highlighted_words:
-                msglist = [message]
-                async for messages in message.channel.history(
-                    limit=5, before=message, oldest_first=False
-                ):
-                    msglist.append(messages)
-                msglist.reverse()
-                context = "\n".join(
-                    f"**{x.author}**: {x.content or '**No Content**'}" for x in msglist
-                )
+            if context is None:
+                context = asyncio.create_task(self.context_embed(message, previous))
+            self.delivery.submit(
+                highlighted_usr,
+                f"Your highlighted word{'s' if len(highlighted_words) > 1 else ''} {humanize_list(list(map(inline, highlighted_words)))} was mentioned in {message.channel.mention} by {message.author.display_name}.\n",
+                context,
+            )
 
-                if len(context) > 2000:
-                    context = "**Context omitted due to message size limits.\n**"
-                embed = discord.Embed(
-                    title="Context:",
-                    colour=self.global_conf.get("colour", 0xFFFFFF),
-                    timestamp=message.created_at,
-                    description=f"{context}",
+    async def can_notify(self, member: discord.Member, channel: discord.abc.GuildChannel) -> bool:
+        """Check whether a member may be highlighted in a channel.
+
+        Results are cached per (guild, member, channel) until they expire or the member's
+        roles, the guild's permissions or the highlight settings change.
+        """
+        key = (channel.guild.id, member.id, channel.id)
+        allowed = self.auth_cache.get(key)
+        if allowed is None:
+            allowed = (
+                (
+                    not self.global_conf.get("restricted")
+                    or await is_mod_or_superior(self.bot, member)
                 )
+                and await self.bot.allowed_by_whitelist_blacklist(member)
+                and channel.permissions_for(member).read_messages
+            )
+            self.auth_cache[key] = allowed
+        return allowed
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self.auth_cache.discard_where(lambda key: key[:2] == (after.guild.id, after.id))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ):
+        # Threads inherit their parent's overwrites, so drop the whole guild.
+        if before.overwrites != after.overwrites:
+            self.auth_cache.discard_where(lambda key: key[0] == after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.permissions != after.permissions:
+            self.auth_cache.discard_where(lambda key: key[0] == after.guild.id)
 
-                embed.add_field(name="Jump", value=f"[Click for context]({message.jump_url})")
-                await highlighted_usr.send(
-                    f"Your highlighted word{'s' if len(highlighted_words) > 1 else ''} {humanize_list(list(map(inline, highlighted_words)))} was mentioned in {message.channel.mention} by {message.author.display_name}.\n",
-                    embed=embed,
+    def mark_notified(self, member: discord.Member):
+        self.cooldowns[member.id] = datetime.now(tz=timezone.utc)
+
+    async def context_embed(self, message: discord.Message, previous: Sequence[discord.Message]):
+        """Build the context embed for a highlighted message.
+
+        Context comes from the channel's recent message buffer, falling back to the API
+        only when the buffer has not been filled yet.
+        """
+        msglist = list(previous)
+        if len(msglist) < CONTEXT_SIZE:
+            msglist = [
+                x
+                async for x in message.channel.history(
+                    limit=CONTEXT_SIZE, before=message, oldest_first=False
                 )
-                self.cooldowns[highlighted_usr.id] = datetime.now(tz=timezone.utc)
+            ]
+            msglist.reverse()
+        msglist.append(message)
+        context = "\n".join(f"**{x.author}**: {x.content or '**No Content**'}" for x in msglist)
+
+        if len(context) > 2000:
+            context = "**Context omitted due to message size limits.\n**"
+        embed = discord.Embed(
+            title="Context:",
+            colour=self.global_conf.get("colour", 0xFFFFFF),
+            timestamp=message.created_at,
+            description=f"{context}",
+        )
+
+        embed.add_field(name="Jump", value=f"[Click for context]({message.jump_url})")
+        return embed
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        recent = self.recent_messages.get(payload.channel_id)
+        if not recent:
+            return
+        for message in recent:
+            if message.id == payload.message_id:
+                recent.remove(message)
+                break
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        recent = self.recent_messages.get(payload.channel_id)
+        if not recent:
+            return
+        kept = [message for message in recent if message.id not in payload.message_ids]
+        recent.clear()
+        recent.extend(kept)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        # Messages sent while disconnected are missing from the buffers.
+        self.recent_messages.clear()
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        self.recent_messages.clear()
 
     def channel_check(self, ctx: commands.Context, channel: discord.TextChannel):
         return (
@@ -290,7 +434,7 @@ class Highlight(commands.Cog):
             else:
                 whitelist.append(user.id)
                 await ctx.send(f"{ctx.author.name} has added {user} to their highlight whitelist.")
-        await self.generate_cache()
+        await self.refresh_member(ctx.guild.id, ctx.author.id)
 
     @whitelist.command(name="list")
     async def whitelist_list(self, ctx: commands.Context):
@@ -338,7 +482,7 @@ class Highlight(commands.Cog):
             else:
                 blacklist.append(user.id)
                 await ctx.send(f"{ctx.author.name} has added {user} to their highlight blacklist.")
-        await self.generate_cache()
+        await self.refresh_member(ctx.guild.id, ctx.author.id)
 
     @blacklist.command(name="channel")
     async def channel_blacklist_addremove(
@@ -358,7 +502,7 @@ class Highlight(commands.Cog):
                 await ctx.send(
                     f"{ctx.author.name} has added {channel} to their highlight blacklist."
                 )
-        await self.generate_cache()
+        await self.refresh_member(ctx.guild.id, ctx.author.id)
 
     @highlight.command(name="cooldown")
     async def cooldown(self, ctx: commands.Context, seconds: int = None):
@@ -381,7 +525,7 @@ class Highlight(commands.Cog):
             return
         await self.config.member(ctx.author).cooldown.set(seconds)
         await ctx.send(f"Your highlight cooldown time has been set to {seconds} seconds.")
-        await self.generate_cache()
+        await self.refresh_member(ctx.guild.id, ctx.author.id)
 
     @highlight.command()
     async def add(
@@ -426,7 +570,7 @@ class Highlight(commands.Cog):
         if failed:
             msg += f"The word{'s' if len(failed) > 1 else ''} {humanize_list(list(map(inline, failed)))} {'are' if len(failed) > 1 else 'is'} already in your highlight list for {channel}."
         await ctx.send(msg)
-        await self.generate_cache()
+        await self.refresh_channel(channel.id)
 
     @highlight.command()
     async def remove(
@@ -462,7 +606,7 @@ class Highlight(commands.Cog):
             a = "doesn't"
             msg += f"The word{'s' if len(failed) > 1 else ''} {humanize_list(list(map(inline, failed)))} {a if len(failed) > 1 else 'do not'} exist in your highlight list for {channel}."
         await ctx.send(msg)
-        await self.generate_cache()
+        await self.refresh_channel(channel.id)
 
     @highlight.command()
     async def toggle(
@@ -494,7 +638,7 @@ class Highlight(commands.Cog):
                 await ctx.send("All your highlights have been enabled.")
             else:
                 await ctx.send("All your highlights have been disabled.")
-            await self.generate_cache()
+            await self.refresh_channel(channel.id)
             return
         word = word.lower()
         async with self.config.channel(channel).highlight() as highlight:
@@ -510,7 +654,7 @@ class Highlight(commands.Cog):
                 await ctx.send(f"The highlight `{word}` has been enabled in {channel}.")
             else:
                 await ctx.send(f"The highlight `{word}` has been disabled in {channel}.")
-        await self.generate_cache()
+        await self.refresh_channel(channel.id)
 
     @highlight.command()
     async def bots(
@@ -555,7 +699,7 @@ class Highlight(commands.Cog):
                 else:
                     await ctx.send("Bots will no longer trigger on any of your highlights.")
 
-                await self.generate_cache()
+                await self.refresh_channel(channel.id)
             else:
                 await ctx.send("Cancelling.")
             return
@@ -579,7 +723,7 @@ class Highlight(commands.Cog):
                     f"The highlight `{word}` will no longer be trigged by bots in {channel}."
                 )
 
-        await self.generate_cache()
+        await self.refresh_channel(channel.id)
 
     @highlight.command(name="list")
     async def _list(self, ctx: commands.Context, channel: Optional[discord.TextChannel] = None):
@@ -667,7 +811,7 @@ class Highlight(commands.Cog):
                 else:
                     await ctx.send("None of your highlights will use word boundaries.")
 
-                await self.generate_cache()
+                await self.refresh_channel(channel.id)
             else:
                 await ctx.send("Cancelling.")
             return
@@ -691,7 +835,7 @@ class Highlight(commands.Cog):
                     f"The highlight `{word}` will no longer use word boundaries in {channel}."
                 )
 
-        await self.generate_cache()
+        await self.refresh_channel(channel.id)
 
     @commands.guild_only()
     @highlight.group(autohelp=True)
@@ -736,7 +880,7 @@ class Highlight(commands.Cog):
         if failed:
             msg += f"The word{'s' if len(failed) > 1 else ''} {humanize_list(list(map(inline, failed)))} {'are' if len(failed) > 1 else 'is'} already in your highlight list for {ctx.guild}."
         await ctx.send(msg)
-        await self.generate_cache()
+        await self.refresh_guild(ctx.guild.id)
 
     @guild.command(name="remove")
     async def guild_remove(self, ctx: commands.Context, *text: str):
@@ -765,7 +909,7 @@ class Highlight(commands.Cog):
             a = "doesn't"
             msg += f"The word{'s' if len(failed) > 1 else ''} {humanize_list(list(map(inline, failed)))} {a if len(failed) > 1 else 'do not'} exist in your highlight list for {ctx.guild}."
         await ctx.send(msg)
-        await self.generate_cache()
+        await self.refresh_guild(ctx.guild.id)
 
     @guild.command(name="toggle")
     async def guild_toggle(
@@ -791,7 +935,7 @@ class Highlight(commands.Cog):
                 await ctx.send("All your highlights have been enabled.")
             else:
                 await ctx.send("All your highlights have been disabled.")
-            await self.generate_cache()
+            await self.refresh_guild(ctx.guild.id)
             return
         word = word.lower()
         async with self.config.guild(ctx.guild).highlight() as highlight:
@@ -807,7 +951,7 @@ class Highlight(commands.Cog):
                 await ctx.send(f"The highlight `{word}` has been enabled for {ctx.guild}.")
             else:
                 await ctx.send(f"The highlight `{word}` has been disabled for {ctx.guild}.")
-        await self.generate_cache()
+        await self.refresh_guild(ctx.guild.id)
 
     @guild.command(name="bots")
     async def guild_bots(
@@ -846,7 +990,7 @@ class Highlight(commands.Cog):
                 else:
                     await ctx.send("Bots will no longer trigger on any of your highlights.")
 
-                await self.generate_cache()
+                await self.refresh_guild(ctx.guild.id)
             else:
                 await ctx.send("Cancelling.")
             return
@@ -870,7 +1014,7 @@ class Highlight(commands.Cog):
                     f"The highlight `{word}` will no longer be trigged by bots for {ctx.guild}."
                 )
 
-        await self.generate_cache()
+        await self.refresh_guild(ctx.guild.id)
 
     @guild.command(name="list")
     async def _guild_list(self, ctx: commands.Context):
@@ -949,7 +1093,7 @@ class Highlight(commands.Cog):
                 else:
                     await ctx.send("None of your highlights will use word boundaries.")
 
-                await self.generate_cache()
+                await self.refresh_guild(ctx.guild.id)
             else:
                 await ctx.send("Cancelling.")
             return
@@ -973,7 +1117,7 @@ class Highlight(commands.Cog):
                     f"The highlight `{word}` will no longer use word boundaries for {ctx.guild}."
                 )
 
-        await self.generate_cache()
+        await self.refresh_guild(ctx.guild.id)
 
     @commands.group()
     @commands.is_owner()
@@ -987,7 +1131,7 @@ class Highlight(commands.Cog):
             return await ctx.send("Max number must be greater than 0.")
         await self.config.max_highlights.set(max_num)
         await ctx.send(f"Max number of highlights set to {max_num}.")
-        await self.generate_cache()
+        await self.refresh_global()
 
     @highlightset.command()
     async def minlen(self, ctx, min_len: int):
@@ -996,7 +1140,7 @@ class Highlight(commands.Cog):
             return await ctx.send("Minimum length cannot be less than 1.")
         await self.config.min_len.set(min_len)
         await ctx.send(f"Minimum length of highlight set to {min_len}.")
-        await self.generate_cache()
+        await self.refresh_global()
 
     @highlightset.command(name="cooldown")
     async def _cooldown(self, ctx, cooldown: int):
@@ -1020,7 +1164,7 @@ class Highlight(commands.Cog):
         else:
             await self.config.colour.set(colour.value)
             await ctx.send("The color has been set.")
-        await self.generate_cache()
+        await self.refresh_global()
 
     @highlightset.command()
     async def restrict(self, ctx, toggle: bool):
@@ -1031,7 +1175,7 @@ class Highlight(commands.Cog):
             await ctx.send("Highlights can now only be used by users with mod/admin permissions.")
         else:
             await ctx.send("Highlights can now be used by all users.")
-        await self.generate_cache()
+        await self.refresh_global()
 
     @highlightset.command()
     async def wipe(self, ctx, user: discord.Member):
@@ -1039,12 +1183,22 @@ class Highlight(commands.Cog):
         async with self.config.guild(ctx.guild).highlight() as highlight_guild:
             if str(user.id) in highlight_guild:
                 del highlight_guild[str(user.id)]
+        await self.refresh_guild(ctx.guild.id)
         for channel in ctx.guild.text_channels:
+            if str(user.id) not in self.highlightcache.get(channel.id, {}).get("highlight", {}):
+                continue
             async with self.config.channel(channel).highlight() as highlight_chann:
                 if str(user.id) in highlight_chann:
                     del highlight_chann[str(user.id)]
+            await self.refresh_channel(channel.id)
         await ctx.send(f"Highlights for {user} have been wiped.")
-        await self.generate_cache()
+
+    @highlightset.command()
+    async def stats(self, ctx):
+        """Show highlight delivery queue statistics."""
+        delivery = self.delivery
+        msg = f"""```ini\n[Queue Depth] = {delivery.depth}\n[Pending Users] = {delivery.pending}\n[Delivered] = {delivery.delivered}\n[Failed] = {delivery.failed}\n[Dropped] = {delivery.dropped}\n[Coalesced] = {delivery.coalesced}\n[Average Latency] = {delivery.average_latency:.2f}s\n[Max Latency] = {delivery.max_latency:.2f}s```"""
+        await ctx.send(msg)
 
     @highlightset.command(aliases=["settings", "showsettings"])
     async def show(self, ctx):
@@ -1059,6 +1213,14 @@ class Highlight(commands.Cog):
         await ctx.send(msg)
 
 
+def drifted(cached: dict, fresh: dict, default: dict) -> set:
+    return {
+        key
+        for key in cached.keys() | fresh.keys()
+        if cached.get(key, default) != fresh.get(key, default)
+    }
+
+
 def yes_or_no(boolean: bool):
     return "Yes" if boolean else "No"
 
@@ -0,0 +1,122 @@
+import re
+from collections import deque
+from typing import Dict, List, Mapping, NamedTuple
+
+
+class Subscription(NamedTuple):
+    user: int
+    index: int
+    word: str
+    bots: bool
+    boundary: bool
+
+
+class HighlightMatcher:
+    """Aho-Corasick automaton over every enabled highlight for a channel.
+
+    One pass over the message content returns every (user, word) hit.
+    Instances are built once from the merged channel and guild highlights and never mutated.
+    """
+
+    __slots__ = (
+        "_goto",
+        "_fail",
+        "_output",
+        "_subscriptions",
+        "_boundaries",
+        "bots",
+    )
+
+    def __init__(self, highlights: Mapping[str, Mapping[str, dict]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._boundaries: Dict[str, re.Pattern] = {}
+        self.bots = False
+
+        for user, words in highlights.items():
+            user = int(user)
+            for index, (word, settings) in enumerate(words.items()):
+                if not settings["toggle"]:
+                    continue
+                key = word.lower()
+                sub = Subscription(
+                    user,
+                    index,
+                    word,
+                    settings.get("bots", False),
+                    settings.get("boundary", False),
+                )
+                self.bots = self.bots or sub.bots
+                if sub.boundary and key not in self._boundaries:
+                    self._boundaries[key] = re.compile(rf"\b{re.escape(key)}\b", flags=re.I)
+                if key not in self._subscriptions:
+                    self._subscriptions[key] = []
+                    self._add_word(key)
+                self._subscriptions[key].append(sub)
+        self._build_links()
+
+    def __bool__(self):
+        return bool(self._subscriptions)
+
+    def _add_word(self, word: str):
+        node = 0
+        for char in word:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append(word)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def search(self, content: str, *, bot: bool = False) -> Dict[int, List[str]]:
+        """Return a mapping of user id to the highlighted words found in ``content``.
+
+        ``content`` is expected to already be lowercased.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for char in content:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+
+        hits: Dict[int, List[Subscription]] = {}
+        for key in found:
+            pattern = self._boundaries.get(key)
+            bounded = None
+            for sub in self._subscriptions[key]:
+                if bot and not sub.bots:
+                    continue
+                if sub.boundary:
+                    if bounded is None:
+                        bounded = pattern.search(content) is not None
+                    if not bounded:
+                        continue
+                hits.setdefault(sub.user, []).append(sub)
+        return {
+            user: [sub.word for sub in sorted(subs, key=lambda x: x.index)]
+            for user, subs in hits.items()
+        }
+
+
+EMPTY_MATCHER = HighlightMatcher({})
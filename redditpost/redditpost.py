@@ -1,9 +1,10 @@
 import asyncio
 import logging
 import re
+import time
 from datetime import datetime, timedelta, timezone
 from html import unescape
-from typing import Optional
+from typing import List, NamedTuple, Optional, Tuple
 
 import aiohttp
 import asyncpraw
@@ -19,6 +20,9 @@ from redbot.core.utils.chat_formatting import box, humanize_timedelta, pagify, s
 log = logging.getLogger("red.flare.redditpost")
 
 REDDIT_LOGO = "https://www.redditinc.com/assets/images/site/reddit-logo.png"
+MAX_CONCURRENT_FETCHES = 8
+MAX_POLL_INTERVAL = 1800
+MIN_WAKEUP = 15
 REDDIT_REGEX = re.compile(
     r"(?i)\A(((https?://)?(www\.)?reddit\.com/)?r/)?([A-Za-z0-9][A-Za-z0-9_]{2,20})/?\Z"
 )
@@ -30,10 +34,19 @@ class Source(discord.ui.View):
         self.add_item(discord.ui.Button(label="Source", url=url))
 
 
+class RenderedPost(NamedTuple):
+    created_utc: float
+    over_18: bool
+    images: bool
+    link: str
+    subreddit: str
+    embed: discord.Embed
+
+
 class RedditPost(commands.Cog):
     """A reddit auto posting cog."""
 
-    __version__ = "0.6.0"
+    __version__ = "0.7.0"
 
     def format_help_for_context(self, ctx):
         """Thanks Sinbad."""
@@ -44,11 +57,16 @@ class RedditPost(commands.Cog):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=959327661803438081, force_registration=True)
         self.config.register_channel(reddits={})
-        self.config.register_global(delay=300, SCHEMA_VERSION=1)
+        self.config.register_global(delay=300, SCHEMA_VERSION=1, cursors={})
         self.session = aiohttp.ClientSession()
         self.bg_loop_task: Optional[asyncio.Task] = None
         self.notified = False
         self.client = None
+        self.fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        self.poll_intervals = {}
+        self.next_poll = {}
+        self.cursors = {}
+        self.webhooks = {}
         self.bot.loop.create_task(self.init())
 
     async def red_get_data_for_user(self, *, user_id: int):
@@ -75,6 +93,7 @@ class RedditPost(commands.Cog):
             )
             await self.config.SCHEMA_VERSION.set(2)
 
+        self.cursors = await self.config.cursors()
         token = await self.bot.get_shared_api_tokens("redditpost")
         try:
             self.client = asyncpraw.Reddit(
@@ -115,9 +134,9 @@ class RedditPost(commands.Cog):
         await self.bot.wait_until_ready()
         while True:
             try:
-                await self.do_feeds()
                 delay = await self.config.delay()
-                await asyncio.sleep(delay)
+                await self.do_feeds(delay)
+                await asyncio.sleep(self.next_wakeup(delay))
             except Exception as exc:
                 log.error("Exception in bg_loop: ", exc_info=exc)
                 if not self.notified:
@@ -125,10 +144,10 @@ class RedditPost(commands.Cog):
                     await self.bot.send_to_owners(msg)
                     self.notified = True
 
-    async def do_feeds(self):
+    async def do_feeds(self, delay: float):
         if self.client is None:
             return
-        feeds = {}
+        subscriptions = {}
         channel_data = await self.config.all_channels()
         for channel_id, data in channel_data.items():
             channel = self.bot.get_channel(channel_id)
@@ -138,30 +157,108 @@ class RedditPost(commands.Cog):
                 url = feed.get("subreddit", None)
                 if not url:
                     continue
-                if url in feeds:
-                    response = feeds[url]
-                else:
-                    response = await self.fetch_feed(url)
-                    feeds[url] = response
-                if response is None:
-                    continue
-                time = await self.format_send(
-                    response,
-                    channel,
-                    feed["last_post"],
-                    url,
-                    {
-                        "latest": feed.get("latest", True),
-                        "webhooks": feed.get("webhooks", False),
-                        "logo": feed.get("logo", REDDIT_LOGO),
-                        "image_only": feed.get("image_only", False),
-                        "source_button": feed.get("source_button", True),
-                        "publish": feed.get("publish", False),
-                    },
-                )
-                if time is not None:
-                    async with self.config.channel(channel).reddits() as feeds_data:
-                        feeds_data[sub]["last_post"] = time
+                subscriptions.setdefault(url, []).append((channel, sub, feed))
+        # Removed or unreachable feeds would otherwise hold the next wakeup in the past.
+        for url in set(self.next_poll).difference(subscriptions):
+            del self.next_poll[url]
+            self.poll_intervals.pop(url, None)
+        now = time.monotonic()
+        due = [url for url in subscriptions if self.next_poll.get(url, 0) <= now]
+        results = await asyncio.gather(
+            *(self.poll_subreddit(url, delay) for url in due), return_exceptions=True
+        )
+
+        cursors = {}
+        last_posts = {}
+        deliveries = []
+        for url, result in zip(due, results):
+            if isinstance(result, Exception):
+                log.error(f"Exception while polling r/{url}: ", exc_info=result)
+                continue
+            if result is None:
+                continue
+            cursors[url], posts = result
+            for channel, sub, feed in subscriptions[url]:
+                settings = self.feed_settings(feed)
+                last_post, embeds = self.prepare_send(posts, channel, feed["last_post"], settings)
+                if last_post is not None:
+                    last_posts.setdefault(channel.id, {})[sub] = last_post
+                if embeds:
+                    deliveries.append((channel, embeds, settings))
+        # Cursors are saved before anything is sent so a restart can never repost. They only
+        # move in memory once saved, so a failed cycle fetches the same posts again.
+        await self.save_cursors(cursors, last_posts)
+        self.cursors.update(cursors)
+        for result in await asyncio.gather(
+            *(self.deliver(*delivery) for delivery in deliveries), return_exceptions=True
+        ):
+            if isinstance(result, Exception):
+                log.error("Exception while posting reddit feed: ", exc_info=result)
+
+    async def poll_subreddit(
+        self, url: str, delay: float
+    ) -> Optional[Tuple[dict, List[RenderedPost]]]:
+        """Fetch and render the new posts of one subreddit, along with its next cursor."""
+        async with self.fetch_semaphore:
+            await self.wait_for_ratelimit()
+            response, newest = await self.fetch_new(url)
+        self.schedule(url, delay, bool(response))
+        if not response:
+            return None
+        cursor = {"name": newest.fullname, "created_utc": newest.created_utc}
+        return cursor, self.render_posts(response, url)
+
+    async def save_cursors(self, cursors: dict, last_posts: dict):
+        """Persist one polling cycle's cursors with a single write per scope.
+
+        The last posts go first, if only they are saved the posts are fetched again but not
+        reposted.
+        """
+        if last_posts:
+            group = self.config._get_base_group(self.config.CHANNEL)
+            async with group.all() as channels:
+                for channel_id, feeds in last_posts.items():
+                    reddits = channels.get(str(channel_id), {}).get("reddits", {})
+                    for sub, last_post in feeds.items():
+                        if sub in reddits:
+                            reddits[sub]["last_post"] = last_post
+        if cursors:
+            async with self.config.cursors() as data:
+                data.update(cursors)
+
+    @staticmethod
+    def feed_settings(feed: dict) -> dict:
+        return {
+            "latest": feed.get("latest", True),
+            "webhooks": feed.get("webhooks", False),
+            "logo": feed.get("logo", REDDIT_LOGO),
+            "image_only": feed.get("image_only", False),
+            "source_button": feed.get("source_button", True),
+            "publish": feed.get("publish", False),
+        }
+
+    async def wait_for_ratelimit(self):
+        """Hold the fetch semaphore until the reddit ratelimit resets if it is nearly used up."""
+        limits = self.client.auth.limits
+        remaining, reset = limits.get("remaining"), limits.get("reset_timestamp")
+        if remaining is not None and reset is not None and remaining < MAX_CONCURRENT_FETCHES:
+            await asyncio.sleep(max(0, reset - time.time()))
+
+    def schedule(self, url: str, delay: float, active: bool):
+        """Poll subreddits that post often at the configured delay and back off quiet ones."""
+        interval = self.poll_intervals.get(url, delay)
+        if active:
+            interval = max(delay, interval / 2)
+        else:
+            interval = min(interval * 1.5, max(delay, MAX_POLL_INTERVAL))
+        self.poll_intervals[url] = interval
+        self.next_poll[url] = time.monotonic() + interval
+
+    def next_wakeup(self, delay: float) -> float:
+        if not self.next_poll:
+            return delay
+        wakeup = min(self.next_poll.values()) - time.monotonic()
+        return min(max(wakeup, MIN_WAKEUP), delay)
 
     @staticmethod
     def _clean_subreddit(subreddit: str):
@@ -323,10 +420,9 @@ class RedditPost(commands.Cog):
         if ctx.interaction:
             await ctx.send("Post sent.", ephemeral=True)
         await self.format_send(
-            data,
+            self.render_posts(data, subreddit),
             channel,
             0,
-            subreddit,
             {
                 "latest": True,
                 "webhooks": feeds[subreddit].get("webhooks", False),
@@ -489,31 +585,58 @@ class RedditPost(commands.Cog):
         except Exception:
             return None
 
-    async def format_send(self, data, channel, last_post, subreddit, settings):
-        timestamps = []
-        embeds = []
-        data = data[:1] if settings.get("latest", True) else data
-        webhook = None
+    async def fetch_new(self, subreddit: str):
+        """Fetch the submissions newer than the subreddit's cursor, newest first.
+
+        Returns them along with the subreddit's newest submission, the next cursor. An
+        unchanged subreddit costs a single one item request and returns an empty list.
+        """
+        cursor = self.cursors.get(subreddit)
+        if cursor is None:
+            resp = await self.fetch_feed(subreddit)
+            return resp, resp[0] if resp else None
         try:
-            if (
-                settings.get("webhooks", False)
-                and channel.permissions_for(channel.guild.me).manage_webhooks
-            ):
-                for hook in await channel.webhooks():
-                    if hook.name == channel.guild.me.name:
-                        webhook = hook
-                if webhook is None:
-                    webhook = await channel.create_webhook(name=channel.guild.me.name)
-        except Exception as e:
-            log.error("Error in webhooks during reddit feed posting", exc_info=e)
+            subreddit = await self.client.subreddit(subreddit)
+            latest = [submission async for submission in subreddit.new(limit=1)]
+            if not latest or latest[0].fullname == cursor["name"]:
+                return [], None
+            resp = [
+                submission
+                async for submission in subreddit.new(limit=20, params={"before": cursor["name"]})
+            ]
+            if not resp or len(resp) >= 20:
+                # A full page holds the submissions right after the cursor rather than the
+                # newest ones, and reddit returns nothing before a removed submission. Both
+                # fall back to the newest submissions.
+                resp = [
+                    submission
+                    async for submission in subreddit.new(limit=20)
+                    if submission.created_utc > cursor["created_utc"]
+                ]
+            return resp, latest[0]
+        except Exception:
+            return None, None
+
+    async def get_webhook(self, channel: discord.TextChannel) -> discord.Webhook:
+        webhook = self.webhooks.get(channel.id)
+        if webhook is None:
+            for hook in await channel.webhooks():
+                if hook.name == channel.guild.me.name:
+                    webhook = hook
+            if webhook is None:
+                webhook = await channel.create_webhook(name=channel.guild.me.name)
+            self.webhooks[channel.id] = webhook
+        return webhook
+
+    @commands.Cog.listener()
+    async def on_webhooks_update(self, channel: discord.abc.GuildChannel):
+        self.webhooks.pop(channel.id, None)
+
+    @staticmethod
+    def render_posts(data, subreddit: str) -> List[RenderedPost]:
+        """Build the channel independent part of each submission once."""
+        posts = []
         for feed in data:
-            timestamp = feed.created_utc
-            if feed.over_18 and not channel.is_nsfw():
-                timestamps.append(timestamp)
-                continue
-            if timestamp <= last_post:
-                break
-            timestamps.append(timestamp)
             desc = unescape(feed.selftext)
             image = feed.url
             link = f"https://reddit.com{feed.permalink}"
@@ -528,7 +651,6 @@ class RedditPost(commands.Cog):
                 title=unescape(title),
                 url=unescape(link),
                 description=desc,
-                color=channel.guild.me.color,
                 timestamp=datetime.fromtimestamp(feed.created_utc, tz=timezone.utc),
             )
             embed.set_author(name=f"New post on r/{unescape(subreddit)}")
@@ -540,37 +662,86 @@ class RedditPost(commands.Cog):
                 images = True
             elif feed.permalink not in image and validators.url(image):
                 embed.add_field(name="Attachment", value=unescape(image))
-            if settings.get("image_only") and not images:
+            posts.append(
+                RenderedPost(
+                    created_utc=feed.created_utc,
+                    over_18=feed.over_18,
+                    images=images,
+                    link=link,
+                    subreddit=str(feed.subreddit),
+                    embed=embed,
+                )
+            )
+        return posts
+
+    def prepare_send(self, posts: List[RenderedPost], channel, last_post, settings):
+        """Apply a channel's settings to the rendered posts.
+
+        Returns the channel's new last post timestamp, or None if there is nothing new, and
+        the embeds to send.
+        """
+        timestamps = []
+        embeds = []
+        posts = posts[:1] if settings.get("latest", True) else posts
+        for post in posts:
+            if post.over_18 and not channel.is_nsfw():
+                timestamps.append(post.created_utc)
+                continue
+            if post.created_utc <= last_post:
+                break
+            timestamps.append(post.created_utc)
+            if settings.get("image_only") and not post.images:
                 continue
-            embeds.append(embed)
-        if timestamps:
-            if embeds:
-                try:
-                    for emb in embeds[::-1]:
-                        if webhook is None:
+            embed = post.embed.copy()
+            embed.colour = channel.guild.me.color
+            embeds.append((post, embed))
+        return (timestamps[0] if timestamps else None), embeds
+
+    async def format_send(self, posts: List[RenderedPost], channel, last_post, settings):
+        last_post, embeds = self.prepare_send(posts, channel, last_post, settings)
+        if embeds:
+            await self.deliver(channel, embeds, settings)
+        return last_post
+
+    async def deliver(self, channel, embeds, settings):
+        webhook = None
+        try:
+            if (
+                settings.get("webhooks", False)
+                and channel.permissions_for(channel.guild.me).manage_webhooks
+            ):
+                webhook = await self.get_webhook(channel)
+        except Exception as e:
+            log.error("Error in webhooks during reddit feed posting", exc_info=e)
+        try:
+            for post, emb in embeds[::-1]:
+                if webhook is None:
+                    try:
+                        msg = await channel.send(
+                            embed=emb,
+                            view=(
+                                Source(post.link) if settings.get("source_button", True) else None
+                            ),
+                        )  # TODO: More approprriate error handling
+                        if settings.get("publish", False):
                             try:
-                                msg = await channel.send(
-                                    embed=emb,
-                                    view=Source(link)
-                                    if settings.get("source_button", True)
-                                    else None,
-                                )  # TODO: More approprriate error handling
-                                if settings.get("publish", False):
-                                    try:
-                                        await msg.publish()
-                                    except discord.Forbidden:
-                                        log.info(
-                                            f"Error publishing message feed in {channel}. Bypassing"
-                                        )
-                            except (discord.Forbidden, discord.HTTPException):
-                                log.info(f"Error sending message feed in {channel}. Bypassing")
-                        else:
-                            await webhook.send(
-                                username=f"r/{feed.subreddit}",
-                                avatar_url=settings.get("icon", REDDIT_LOGO),
-                                embed=emb,
-                            )
-                except discord.HTTPException as exc:
-                    log.error("Exception in bg_loop while sending message: ", exc_info=exc)
-            return timestamps[0]
-        return None
+                                await msg.publish()
+                            except discord.Forbidden:
+                                log.info(f"Error publishing message feed in {channel}. Bypassing")
+                    except (discord.Forbidden, discord.HTTPException):
+                        log.info(f"Error sending message feed in {channel}. Bypassing")
+                else:
+                    hook_kwargs = {
+                        "username": f"r/{post.subreddit}",
+                        "avatar_url": settings.get("icon", REDDIT_LOGO),
+                        "embed": emb,
+                    }
+                    try:
+                        await webhook.send(**hook_kwargs)
+                    except discord.NotFound:
+                        # The cached webhook was deleted, look it up again.
+                        self.webhooks.pop(channel.id, None)
+                        webhook = await self.get_webhook(channel)
+                        await webhook.send(**hook_kwargs)
+        except discord.HTTPException as exc:
+            log.error("Exception in bg_loop while sending message: ", exc_info=exc)
@@ -0,0 +1,147 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+from .objects import EMBED_PARTS, TriggerObject
+
+
+def embed_text(embeds, part: str) -> str:
+    """Extract the searchable text of one part of a message's embeds."""
+    if part == "title":
+        texts = (embed.title for embed in embeds)
+    elif part == "description":
+        texts = (embed.description for embed in embeds)
+    elif part == "fields":
+        texts = (
+            text
+            for embed in embeds
+            for field in embed.fields
+            for text in (field.name, field.value)
+        )
+    else:
+        texts = (embed.footer.text for embed in embeds)
+    return "\n".join(text for text in texts if text)
+
+
+class Automaton:
+    """Aho-Corasick automaton returning every key found in a single pass over the text."""
+
+    __slots__ = ("_goto", "_fail", "_output")
+
+    def __init__(self, keys: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+        for key in keys:
+            self._add(key)
+        self._link()
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def _add(self, key: str):
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = nxt
+        if key not in self._output[node]:
+            self._output[node] += (key,)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._output[nxt] += self._output[self._fail[nxt]]
+
+    def findall(self, text: str) -> Set[str]:
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+class TriggerIndex:
+    """Compiled index over every enabled trigger in a guild.
+
+    Triggers are partitioned by case sensitivity. The message content is lowercased once
+    and each automaton walks it a single time. Word boundary triggers are always case
+    insensitive and are confirmed with their own pattern once their text was found.
+    """
+
+    def __init__(self, triggers: Mapping[str, TriggerObject]):
+        self._sensitive: Dict[str, List[Tuple[int, TriggerObject]]] = {}
+        self._insensitive: Dict[str, List[Tuple[int, TriggerObject]]] = {}
+        self._embeds: Dict[str, Dict[str, List[Tuple[int, TriggerObject]]]] = {
+            part: {} for part in EMBED_PARTS
+        }
+        for position, obj in enumerate(triggers.values()):
+            if not obj.toggle or not obj.trigger:
+                continue
+            entry = (position, obj)
+            if obj.word_boundary:
+                obj.pattern = re.compile(rf"\b{re.escape(obj.trigger.lower())}\b", flags=re.I)
+                self._insensitive.setdefault(obj.trigger.lower(), []).append(entry)
+                continue
+            if obj.case_sensitive:
+                self._sensitive.setdefault(obj.trigger, []).append(entry)
+            else:
+                self._insensitive.setdefault(obj.trigger.lower(), []).append(entry)
+            if obj.embed_search:
+                for part in set(obj.embed_parts).intersection(EMBED_PARTS):
+                    self._embeds[part].setdefault(obj.trigger.lower(), []).append(entry)
+        self._sensitive_automaton = Automaton(self._sensitive)
+        self._insensitive_automaton = Automaton(self._insensitive)
+        self._embed_automatons = {
+            part: Automaton(entries) for part, entries in self._embeds.items() if entries
+        }
+
+    def __bool__(self):
+        return bool(self._sensitive or self._insensitive)
+
+    def search(self, message, *, embeds_only: bool = False) -> List[TriggerObject]:
+        """Return every trigger matching the message, in creation order.
+
+        ``embeds_only`` limits the results to triggers with embed search enabled.
+        """
+        content = message.content
+        matched: Dict[int, TriggerObject] = {}
+        for automaton, entries, text in (
+            (self._insensitive_automaton, self._insensitive, content.lower()),
+            (self._sensitive_automaton, self._sensitive, content),
+        ):
+            if not automaton:
+                continue
+            for key in automaton.findall(text):
+                for position, obj in entries[key]:
+                    if embeds_only and not obj.embed_search:
+                        continue
+                    if obj.word_boundary and not obj.pattern.search(content):
+                        continue
+                    matched[position] = obj
+        if self._embed_automatons and message.embeds:
+            for part, automaton in self._embed_automatons.items():
+                text = embed_text(message.embeds, part)
+                if not text:
+                    continue
+                for key in automaton.findall(text.lower()):
+                    for position, obj in self._embeds[part][key]:
+                        matched.setdefault(position, obj)
+        return [matched[position] for position in sorted(matched)]
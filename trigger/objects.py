@@ -1,6 +1,59 @@
 import datetime
 import random
 import re
+from copy import deepcopy
+
+EMBED_PARTS = ("title", "description", "fields", "footer")
+TEMPLATE_OBJECTS = frozenset({"user", "uses", "channel", "guild", "message", "trigger"})
+TRANSIENT_ATTRS = frozenset({"timestamp", "pattern", "dirty", "templates"})
+PARAMETER_RE = re.compile(r"{([^}]+)\}")
+
+
+class ResponseTemplate:
+    """A response compiled once into literal segments and parameter accessors."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, response: str):
+        parts = []
+        literal = ""
+        position = 0
+        for match in PARAMETER_RE.finditer(response):
+            literal += response[position : match.start()]
+            position = match.end()
+            accessor = self.compile_parameter(match.group(1))
+            if isinstance(accessor, str):
+                literal += accessor
+                continue
+            if literal:
+                parts.append(literal)
+                literal = ""
+            parts.append(accessor)
+        literal += response[position:]
+        if literal:
+            parts.append(literal)
+        self.parts = tuple(parts)
+
+    # https://github.com/Cog-Creators/Red-DiscordBot/blob/V3/develop/redbot/cogs/customcom/customcom.py#L824
+    @staticmethod
+    def compile_parameter(result):
+        """
+        For security reasons only specific objects are allowed
+        Internals are ignored
+        """
+        raw_result = "{" + result + "}"
+        if result in TEMPLATE_OBJECTS:
+            return lambda objects: str(objects[result])
+        try:
+            first, second = result.split(".")
+        except ValueError:
+            return raw_result
+        if first not in TEMPLATE_OBJECTS or second.startswith("_"):
+            return raw_result
+        return lambda objects: str(getattr(objects[first], second, raw_result))
+
+    def render(self, objects) -> str:
+        return "".join(part if isinstance(part, str) else part(objects) for part in self.parts)
 
 
 class TriggerObject:
@@ -17,51 +70,26 @@ class TriggerObject:
         self.case_sensitive = kwargs.get("case_sensitive", True)
         self.word_boundary = kwargs.get("word_boundary", False)
         self.embed_search = kwargs.get("embed_search", False)
+        self.embed_parts = kwargs.get("embed_parts", list(EMBED_PARTS))
         self.pattern = None
+        self.dirty = False
+        self.templates = [ResponseTemplate(response) for response in self.responses or []]
 
-    def check(self, message):
-        if not self.toggle:
-            return False
-
-        trigger = self.trigger
-        content = message.content
-        if not self.case_sensitive:
-            trigger = trigger.lower()
-            content = content.lower()
-
-        if self.cooldown > 0:
-            if self.timestamp is None:
-                self.timestamp = datetime.datetime.now(tz=datetime.timezone.utc)
-            else:
-                now = datetime.datetime.now(tz=datetime.timezone.utc)
-                diff = now - self.timestamp
-                if diff.total_seconds() < self.cooldown:
-                    return False
-                else:
-                    self.timestamp = now
+    def to_dict(self) -> dict:
+        return deepcopy(
+            {key: value for key, value in self.__dict__.items() if key not in TRANSIENT_ATTRS}
+        )
 
-        if self.word_boundary:
-            if self.pattern is None:
-                self.pattern = re.compile(rf"\b{re.escape(self.trigger.lower())}\b", flags=re.I)
-            if self.pattern.search(content):
-                return True
-        elif trigger in content:
+    def ready(self) -> bool:
+        if self.cooldown <= 0 or self.timestamp is None:
             return True
-        elif self.embed_search:
-            embeds = message.embeds
-            if len(embeds) > 0:
-                embed_dict_list = []
-                for embed in embeds:
-                    embed_dict_list.append(embed.to_dict())
-                if self.pattern is None:
-                    self.pattern = re.compile(rf"{re.escape(self.trigger.lower())}", flags=re.I)
-                if self.pattern.search(str(embed_dict_list)):
-                    return True
-        return False
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        return (now - self.timestamp).total_seconds() >= self.cooldown
 
     async def respond(self, message):
-        response = random.choice(self.responses)
+        template = random.choice(self.templates)
         self.uses += 1
+        self.dirty = True
         self.timestamp = datetime.datetime.now(tz=datetime.timezone.utc)
         objects = {
             "user": message.author,
@@ -71,35 +99,7 @@ class TriggerObject:
             "message": message,
             "trigger": self.trigger_name,
         }
-        resp = self.transform_message(response, objects)
-        await message.channel.send(resp)
+        await message.channel.send(template.render(objects))
 
     def __repr__(self) -> str:
         return f"<TriggerObject trigger={self.trigger}>"
-
-    # https://github.com/Cog-Creators/Red-DiscordBot/blob/V3/develop/redbot/cogs/customcom/customcom.py#L824
-    @staticmethod
-    def transform_parameter(result, objects) -> str:
-        """
-        For security reasons only specific objects are allowed
-        Internals are ignored
-        """
-        raw_result = "{" + result + "}"
-        if result in objects:
-            return str(objects[result])
-        try:
-            first, second = result.split(".")
-        except ValueError:
-            return raw_result
-        if first in objects and not second.startswith("_"):
-            first = objects[first]
-        else:
-            return raw_result
-        return str(getattr(first, second, raw_result))
-
-    def transform_message(self, message, objects):
-        results = re.findall(r"{([^}]+)\}", message)
-        for result in results:
-            param = self.transform_parameter(result, objects)
-            message = message.replace("{" + result + "}", param)
-        return message
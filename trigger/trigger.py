@@ -1,17 +1,20 @@
 import asyncio
 import contextlib
-from copy import deepcopy
+import logging
 
 import discord
 from redbot.core import Config, commands
 from redbot.core.utils.menus import DEFAULT_CONTROLS, menu
 from redbot.core.utils.predicates import MessagePredicate
 
-from .objects import TriggerObject
+from .matcher import TriggerIndex
+from .objects import EMBED_PARTS, TriggerObject
+
+log = logging.getLogger("red.flare.trigger")
 
 
 class Trigger(commands.Cog):
-    __version__ = "0.2.2"
+    __version__ = "0.3.0"
     __author__ = "flare(flare#0001)"
 
     def format_help_for_context(self, ctx):
@@ -24,6 +27,7 @@ class Trigger(commands.Cog):
         self.config.register_guild(triggers={})
 
         self.triggers = {}
+        self.indexes = {}
         self.bg_config_loop = asyncio.create_task(self.init_loop())
         with contextlib.suppress(Exception):
             self.bot.add_dev_env_value("trigger", lambda x: self)
@@ -41,13 +45,31 @@ class Trigger(commands.Cog):
             self.bot.remove_dev_env_value("trigger")
 
     async def save_triggers(self):
+        """Persist the triggers whose usage changed since the last save, one write per guild."""
+        dirty = {}
         for guild_id, triggers in self.triggers.items():
-            guild_triggers = {}
-            for trigger in triggers:
-                guild_triggers[trigger] = deepcopy(triggers[trigger].__dict__)
-                del guild_triggers[trigger]["timestamp"]
-                del guild_triggers[trigger]["pattern"]
-            await self.config.guild_from_id(guild_id).triggers.set(guild_triggers)
+            changed = {name: obj for name, obj in triggers.items() if obj.dirty}
+            if changed:
+                dirty[guild_id] = changed
+        for guild_id, changed in dirty.items():
+            written = []
+            try:
+                async with self.config.guild_from_id(guild_id).triggers() as triggers:
+                    current = self.triggers.get(guild_id, {})
+                    for name in changed:
+                        # Triggers edited while waiting for the lock were replaced, only the
+                        # usage of the current object is saved so the edit isn't undone.
+                        obj = current.get(name)
+                        # Skip triggers deleted since they were used.
+                        if obj is not None and name in triggers:
+                            triggers[name]["uses"] = obj.uses
+                            written.append((obj, obj.uses))
+            except Exception as exc:
+                log.error("Error saving triggers of guild %s: ", guild_id, exc_info=exc)
+                continue
+            for obj, uses in written:
+                if obj.uses == uses:
+                    obj.dirty = False
 
     async def init_loop(self):
         await self.bot.wait_until_ready()
@@ -59,6 +81,7 @@ class Trigger(commands.Cog):
                 self.triggers[guild_id][trigger] = TriggerObject(
                     **guild_triggers["triggers"][trigger]
                 )
+        self.indexes.clear()
         while True:
             await asyncio.sleep(60)
             await self.save_triggers()
@@ -69,10 +92,8 @@ class Trigger(commands.Cog):
             return
         if message.guild is None:
             return
-        guild = message.guild
-        for trigger in self.triggers.get(guild.id, {}):
-            obj = self.triggers[guild.id][trigger]
-            if obj.check(message):
+        for obj in self.get_index(message.guild.id).search(message):
+            if obj.ready():
                 await obj.respond(message)
 
     @commands.Cog.listener()
@@ -90,11 +111,16 @@ class Trigger(commands.Cog):
             # message = discord.Message(state=channel._state, channel=channel, data=payload.data)
         if message.author.bot:
             return
-        for trigger in self.triggers.get(guild.id, {}):
-            obj = self.triggers[guild.id][trigger]
-            if obj.embed_search and obj.check(message):
+        for obj in self.get_index(guild.id).search(message, embeds_only=True):
+            if obj.ready():
                 await obj.respond(message)
 
+    def get_index(self, guild_id: int) -> TriggerIndex:
+        index = self.indexes.get(guild_id)
+        if index is None:
+            index = self.indexes[guild_id] = TriggerIndex(self.triggers.get(guild_id, {}))
+        return index
+
     @commands.group()
     @commands.guild_only()
     @commands.has_permissions(manage_guild=True)
@@ -152,6 +178,7 @@ class Trigger(commands.Cog):
                 "case_sensitive": False,
                 "word_boundary": False,
                 "embed_search": False,
+                "embed_parts": list(EMBED_PARTS),
             }
             await self.update_trigger(ctx.guild, trigger_name, triggers[trigger_name])
 
@@ -170,6 +197,7 @@ class Trigger(commands.Cog):
             del triggers[trigger_name]
         if trigger_name in self.triggers.get(ctx.guild.id, {}):
             del self.triggers[ctx.guild.id][trigger_name]
+            self.indexes.pop(ctx.guild.id, None)
         await ctx.send("Trigger deleted.")
 
     @trigger.command(name="list")
@@ -294,6 +322,27 @@ class Trigger(commands.Cog):
             await self.update_trigger(ctx.guild, trigger_name, triggers[trigger_name])
         await ctx.tick()
 
+    @edit.command(name="embedparts")
+    async def embed_parts(self, ctx, trigger_name: str, *parts: str):
+        """
+        Set which parts of embeds are searched for the trigger.
+
+        Valid parts are `title`, `description`, `fields` and `footer`.
+        Passing no parts will search all of them.
+        """
+        parts = [part.lower() for part in parts] or list(EMBED_PARTS)
+        if invalid := [part for part in parts if part not in EMBED_PARTS]:
+            await ctx.send(f"Invalid embed parts: {', '.join(invalid)}")
+            return
+        trigger_name = trigger_name.lower()
+        async with self.config.guild(ctx.guild).triggers() as triggers:
+            if trigger_name not in triggers:
+                await ctx.send("Trigger does not exist.")
+                return
+            triggers[trigger_name]["embed_parts"] = parts
+            await self.update_trigger(ctx.guild, trigger_name, triggers[trigger_name])
+        await ctx.tick()
+
     @edit.command()
     async def responses(self, ctx, trigger_name: str):
         """
@@ -327,4 +376,8 @@ class Trigger(commands.Cog):
     async def update_trigger(self, guild, trigger_name, trigger_data):
         if guild.id not in self.triggers:
             self.triggers[guild.id] = {}
+        if old := self.triggers[guild.id].get(trigger_name):
+            # Carry over usage which may not have been saved yet.
+            trigger_data["uses"] = old.uses
         self.triggers[guild.id][trigger_name] = TriggerObject(**trigger_data)
+        self.indexes.pop(guild.id, None)
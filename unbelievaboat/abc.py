@@ -1,8 +1,12 @@
 from abc import ABC
+from typing import Any, Dict, Mapping
 
 from redbot.core import Config
 from redbot.core.bot import Red
 
+from .cooldowns import CooldownStore
+from .ledger import WalletLedger
+
 
 class MixinMeta(ABC):
     """Base class for well behaved type hint detection with composite class.
@@ -13,3 +17,6 @@ class MixinMeta(ABC):
     def __init__(self, *_args):
         self.config: Config
         self.bot: Red
+        self.ledger: WalletLedger
+        self.cooldown_store: CooldownStore
+        self.settings_cache: Dict[int, Mapping[str, Any]]
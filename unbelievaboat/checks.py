@@ -26,21 +26,17 @@ def check_global_setting_admin():
 
 def wallet_disabled_check():
     async def predicate(ctx):
-        if await bank.is_global():
-            return await ctx.bot.get_cog("Unbelievaboat").config.disable_wallet()
-        if ctx.guild is None:
+        if ctx.guild is None and not await bank.is_global():
             return False
-        return await ctx.bot.get_cog("Unbelievaboat").config.guild(ctx.guild).disable_wallet()
+        return (await ctx.bot.get_cog("Unbelievaboat").settingsnapshot(ctx))["disable_wallet"]
 
     return commands.check(predicate)
 
 
 def roulette_disabled_check():
     async def predicate(ctx):
-        if await bank.is_global():
-            return await ctx.bot.get_cog("Unbelievaboat").config.roulette_toggle()
-        if ctx.guild is None:
+        if ctx.guild is None and not await bank.is_global():
             return False
-        return await ctx.bot.get_cog("Unbelievaboat").config.guild(ctx.guild).roulette_toggle()
+        return (await ctx.bot.get_cog("Unbelievaboat").settingsnapshot(ctx))["roulette_toggle"]
 
     return commands.check(predicate)
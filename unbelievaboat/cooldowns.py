@@ -0,0 +1,67 @@
+import datetime
+import time
+from typing import Dict, Optional, Set
+
+from redbot.core import Config
+
+from .ledger import Key, account_group
+
+
+class CooldownStore:
+    """When each account last used a cooldown-limited command.
+
+    Checks are answered from memory. The timestamps are loaded from Config on first use and
+    written back in batches, so they still survive a restart. Entries that weren't used for
+    ``expiry`` seconds and have nothing left to save are dropped from memory.
+    """
+
+    field = "cooldowns"
+
+    def __init__(self, config: Config, *, expiry: float = 3600.0):
+        self.config = config
+        self.expiry = expiry
+        self._times: Dict[Key, Dict[str, Optional[int]]] = {}
+        self._used: Dict[Key, float] = {}
+        self._dirty: Set[Key] = set()
+
+    async def get(self, key: Key) -> Dict[str, Optional[int]]:
+        times = self._times.get(key)
+        if times is None:
+            loaded = await account_group(self.config, key).cooldowns()
+            times = self._times.setdefault(key, loaded)
+        self._used[key] = time.monotonic()
+        return times
+
+    async def check(self, key: Key, job: str, cooldown: int) -> Optional[int]:
+        """Start the job's cooldown and return None, or return the seconds left on it."""
+        times = await self.get(key)
+        now = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        last = times.get(job)
+        if last is not None and now - last < cooldown:
+            return cooldown - (now - last)
+        times[job] = now
+        self._dirty.add(key)
+        return None
+
+    def forget(self, user_id: int):
+        for key in [key for key in self._times if key[1] == user_id]:
+            del self._times[key]
+            self._used.pop(key, None)
+            self._dirty.discard(key)
+
+    def dirty_keys(self) -> Set[Key]:
+        return set(self._dirty)
+
+    def unsaved(self, key: Key) -> Optional[Dict[str, Optional[int]]]:
+        return dict(self._times[key]) if key in self._dirty else None
+
+    def mark_saved(self, key: Key, times: Dict[str, Optional[int]]):
+        if self._times.get(key) == times:
+            self._dirty.discard(key)
+
+    def evict(self):
+        cutoff = time.monotonic() - self.expiry
+        for key in [key for key, used in self._used.items() if used < cutoff]:
+            if key not in self._dirty:
+                del self._times[key]
+                del self._used[key]
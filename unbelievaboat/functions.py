@@ -1,4 +1,5 @@
 import random
+from types import MappingProxyType
 
 
 def roll():
@@ -23,6 +24,15 @@ def roll():
         return 0.85
 
 
+def freeze(data):
+    """Read-only copy of nested Config data."""
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(value) for value in data)
+    return data
+
+
 def chunks(l, n):
     """Yield successive n-sized chunks from l."""
     for i in range(0, len(l), n):
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import logging
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from redbot.core import Config
+
+log = logging.getLogger("red.flare.unbelievaboat")
+
+# (guild id, user id), the guild id is 0 for accounts of the global bank.
+Key = Tuple[int, int]
+
+
+def account_group(config: Config, key: Key):
+    guild_id, user_id = key
+    if guild_id == 0:
+        return config.user_from_id(user_id)
+    return config.member_from_ids(guild_id, user_id)
+
+
+def scope_group(config: Config, guild_id: int):
+    """Every account of a guild, or of the global bank for guild id 0."""
+    if guild_id == 0:
+        return config._get_base_group(config.USER)
+    return config._get_base_group(config.MEMBER, str(guild_id))
+
+
+class Account:
+    __slots__ = ("key", "balance")
+
+    def __init__(self, key: Key, balance: int):
+        self.key = key
+        self.balance = balance
+
+
+class Leaderboard:
+    """Wallets of one scope kept sorted by balance, richest first."""
+
+    def __init__(self, balances: Dict[int, int]):
+        self._balances = dict(balances)
+        self._order: List[Tuple[int, int]] = sorted(
+            (-balance, user_id) for user_id, balance in balances.items()
+        )
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return ((user_id, -balance) for balance, user_id in self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, user_id: int, balance: int):
+        self.remove(user_id)
+        self._balances[user_id] = balance
+        insort(self._order, (-balance, user_id))
+
+    def remove(self, user_id: int):
+        balance = self._balances.pop(user_id, None)
+        if balance is not None:
+            del self._order[bisect_left(self._order, (-balance, user_id))]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        return bisect_left(self._order, (-balance, user_id)) + 1
+
+
+class WalletLedger:
+    """Wallet balances kept in memory and written back to Config in batches.
+
+    Every change goes through :meth:`accounts`, which holds the per-wallet locks for the
+    whole read-modify-write so concurrent payouts can't lose updates.
+    """
+
+    field = "wallet"
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._balances: Dict[Key, int] = {}
+        self._locks: Dict[Key, asyncio.Lock] = {}
+        self._dirty: Set[Key] = set()
+        self._boards: Dict[int, Leaderboard] = {}
+        # Scope writes replace every account of the scope, so all writes of account data
+        # hold this lock to keep them from undoing each other.
+        self.write_lock = asyncio.Lock()
+
+    async def _load(self, key: Key) -> int:
+        if key not in self._balances:
+            self._balances[key] = await account_group(self.config, key).wallet()
+        return self._balances[key]
+
+    async def balance(self, key: Key) -> int:
+        if key in self._balances:
+            return self._balances[key]
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            return await self._load(key)
+
+    @contextlib.asynccontextmanager
+    async def accounts(self, *keys: Key, save: bool = False):
+        """Lock the given wallets and yield an :class:`Account` for each of them.
+
+        Changes to ``Account.balance`` are applied when the block exits. With ``save`` they
+        are also written to Config right away instead of with the next flush, for moves
+        that touch the bank as well.
+        """
+        if len(set(keys)) != len(keys):
+            raise ValueError("A wallet can only be locked once per block.")
+        async with contextlib.AsyncExitStack() as stack:
+            # A fixed lock order keeps transfers between the same two wallets from deadlocking.
+            for key in sorted(keys):
+                await stack.enter_async_context(self._locks.setdefault(key, asyncio.Lock()))
+            accounts: List[Account] = [Account(key, await self._load(key)) for key in keys]
+            try:
+                yield accounts
+            finally:
+                for account in accounts:
+                    if account.balance != self._balances[account.key]:
+                        self._balances[account.key] = account.balance
+                        self._dirty.add(account.key)
+                        board = self._boards.get(account.key[0])
+                        if board is not None:
+                            board.update(account.key[1], account.balance)
+                if save:
+                    async with self.write_lock:
+                        for account in accounts:
+                            if account.key in self._dirty:
+                                await account_group(self.config, account.key).wallet.set(
+                                    account.balance
+                                )
+                                self._dirty.discard(account.key)
+
+    @contextlib.asynccontextmanager
+    async def account(self, key: Key, *, save: bool = False):
+        async with self.accounts(key, save=save) as (account,):
+            yield account
+
+    async def leaderboard(self, guild_id: int) -> Leaderboard:
+        """The leaderboard of a guild, or of the global bank for guild id 0.
+
+        It is built from Config on first use and kept up to date by every wallet change.
+        """
+        board = self._boards.get(guild_id)
+        if board is not None:
+            return board
+        if guild_id == 0:
+            raw = await self.config.all_users()
+        else:
+            raw = await self.config._get_base_group(self.config.MEMBER, str(guild_id)).all()
+        balances = {int(user_id): data.get("wallet", 0) for user_id, data in raw.items()}
+        balances.update(
+            (user_id, balance)
+            for (scope, user_id), balance in self._balances.items()
+            if scope == guild_id
+        )
+        board = self._boards[guild_id] = Leaderboard(balances)
+        return board
+
+    def forget(self, user_id: int):
+        """Drop every cached wallet of a user, used after their Config data was cleared."""
+        for key in [key for key in self._balances if key[1] == user_id]:
+            del self._balances[key]
+            self._dirty.discard(key)
+        for board in self._boards.values():
+            board.remove(user_id)
+
+    def dirty_keys(self) -> Set[Key]:
+        return set(self._dirty)
+
+    def unsaved(self, key: Key) -> Optional[int]:
+        return self._balances[key] if key in self._dirty else None
+
+    def mark_saved(self, key: Key, balance: int):
+        if self._balances.get(key) == balance:
+            self._dirty.discard(key)
+
+
+async def flush_accounts(config: Config, lock: asyncio.Lock, *stores):
+    """Write the changed accounts of every store back with a single Config write per scope.
+
+    Each store saves its values under its own ``field`` of the account. An account only
+    counts as saved once its write succeeded, so a failed or cancelled flush leaves it for
+    the next one.
+    """
+    scopes: Dict[int, Set[int]] = {}
+    for store in stores:
+        for guild_id, user_id in store.dirty_keys():
+            scopes.setdefault(guild_id, set()).add(user_id)
+    for guild_id, user_ids in scopes.items():
+        written = []
+        try:
+            async with lock, scope_group(config, guild_id).all() as data:
+                for user_id in user_ids:
+                    key = (guild_id, user_id)
+                    for store in stores:
+                        # None for accounts forgotten or saved by another write meanwhile.
+                        value = store.unsaved(key)
+                        if value is not None:
+                            data.setdefault(str(user_id), {})[store.field] = value
+                            written.append((store, key, value))
+        except Exception as exc:
+            log.error("Error saving accounts of %s: ", guild_id, exc_info=exc)
+            continue
+        for store, key, value in written:
+            store.mark_saved(key, value)
@@ -53,12 +53,6 @@ NUMBERS = {
 
 EMOJIS = {"black": "\u2B1B", "red": "\U0001F7E5", "green": "\U0001F7E9"}
 
-COLUMNS = [
-    [1, 4, 7, 10, 13, 16, 19, 22, 25, 28, 31, 34],
-    [2, 5, 8, 11, 14, 17, 20, 23, 26, 29, 32, 35],
-    [3, 6, 9, 12, 15, 18, 21, 24, 27, 30, 33, 36],
-]
-
 BET_TYPES = {
     "red": "color",
     "black": "color",
@@ -74,6 +68,12 @@ BET_TYPES = {
     "3rd column": "column",
 }
 
+BET_BUCKETS = ("zero", "single", "color", "dozen", "odd_or_even", "halfs", "column")
+
+DOZENS = ("1st dozen", "2nd dozen", "3rd dozen")
+
+COLUMN_NAMES = ("1st column", "2nd column", "3rd column")
+
 
 class Roulette(MixinMeta):
     """Roulette Game."""
@@ -92,104 +92,75 @@ class Roulette(MixinMeta):
         if isinstance(_type, int):
             if _type < 0 or _type > 36:
                 return {"failed": "Bet must be between 0 and 36."}
-            if _type == 0:
-                for better in self.roulettegames[ctx.guild.id]["zero"]:
-                    if better.get(_type, False) and better[_type]["user"] == ctx.author.id:
-                        return {"failed": "You cannot make duplicate bets."}
-                try:
-                    await self.roulettewithdraw(ctx, bet)
-                except ValueError:
-                    return {"failed": "You do not have enough funds to complete this bet."}
-                self.roulettegames[ctx.guild.id]["zero"].append(
-                    {_type: {"user": ctx.author.id, "amount": bet}}
-                )
-                return {"sucess": 200}
-            for better in self.roulettegames[ctx.guild.id]["number"]:
-                if better.get(_type, False) and better[_type]["user"] == ctx.author.id:
-                    return {"failed": "You cannot make duplicate bets."}
-            self.roulettegames[ctx.guild.id]["number"].append(
-                {_type: {"user": ctx.author.id, "amount": bet}}
-            )
-            try:
-                await self.roulettewithdraw(ctx, bet)
-            except ValueError:
-                return {"failed": "You do not have enough funds to complete this bet."}
-            return {"sucess": 200}
-        if _type.lower() in BET_TYPES:
-            for better in self.roulettegames[ctx.guild.id][BET_TYPES[_type.lower()]]:
-                if (
-                    better.get(_type.lower(), False)
-                    and better[_type.lower()]["user"] == ctx.author.id
-                ):
-                    return {"failed": "You cannot make duplicate bets."}
-            try:
-                await self.roulettewithdraw(ctx, bet)
-            except ValueError:
-                return {"failed": "You do not have enough funds to complete this bet."}
-            self.roulettegames[ctx.guild.id][BET_TYPES[_type.lower()]].append(
-                {_type.lower(): {"user": ctx.author.id, "amount": bet}}
-            )
-            return {"sucess": 200}
-        return {"failed": "Not a valid option"}
+            bettype = "zero" if _type == 0 else "single"
+        elif _type.lower() in BET_TYPES:
+            _type = _type.lower()
+            bettype = BET_TYPES[_type]
+        else:
+            return {"failed": "Not a valid option"}
+        betters = self.roulettegames[ctx.guild.id][bettype].setdefault(_type, {})
+        if ctx.author.id in betters:
+            return {"failed": "You cannot make duplicate bets."}
+        # Hold the spot while the withdrawal is awaited so a second bet can't slip in.
+        betters[ctx.author.id] = bet
+        try:
+            await self.roulettewithdraw(ctx, bet)
+        except ValueError:
+            del betters[ctx.author.id]
+            return {"failed": "You do not have enough funds to complete this bet."}
+        return {"sucess": 200}
 
     async def payout(self, ctx, winningnum, bets):
-        msg = []
-        conf = await self.configglobalcheck(ctx)
-        payouts = await conf.roulette_payouts()
-        color = NUMBERS[winningnum]
-        odd_even = "odd" if winningnum % 2 != 0 else "even"
-        half = "1st half" if winningnum <= 18 else "2nd half"
-        dozen = "N/A"
-        if bets["dozen"]:
-            if winningnum == 0:
-                dozen = "No dozen winning bet."
-            elif winningnum <= 12:
-                dozen = "1st dozen"
-            elif winningnum <= 24:
-                dozen = "2nd dozen"
-            else:
-                dozen = "3rd dozen"
-        column = "N/A"
-        if bets["column"]:
-            if winningnum == 0:
-                pass
-            elif winningnum in COLUMNS[0]:
-                column = "1st column"
-            elif winningnum in COLUMNS[1]:
-                column = "2nd column"
-            else:
-                column = "3rd column"
+        payouts = (await self.settingsnapshot(ctx))["roulette_payouts"]
+        if winningnum == 0:
+            dozen = column = None
+        else:
+            dozen = DOZENS[(winningnum - 1) // 12]
+            column = COLUMN_NAMES[(winningnum - 1) % 3]
         payout_types = {
             "zero": winningnum,
-            "color": color,
+            "color": NUMBERS[winningnum],
             "single": winningnum,
-            "odd_or_even": odd_even,
-            "halfs": half,
+            "odd_or_even": "odd" if winningnum % 2 != 0 else "even",
+            "halfs": "1st half" if winningnum <= 18 else "2nd half",
             "dozen": dozen,
             "column": column,
         }
+        # Each bet type only holds one winning choice, so the winners are a lookup away.
+        winners = []
+        totals = {}
         for bettype, value in payout_types.items():
-            for bet in bets[bettype]:
-                bet_type = list(bet.keys())[0]
-                if bet_type == value:
-                    betinfo = list(bet.values())[0]
-                    user = ctx.guild.get_member(betinfo["user"])
-                    payout = betinfo["amount"] + (betinfo["amount"] * payouts[bettype])
-                    if not await self.walletdisabledcheck(ctx):
-                        user_conf = await self.configglobalcheckuser(user)
-                        wallet = await user_conf.wallet()
-                        try:
-                            await self.walletdeposit(ctx, user, payout)
-                        except ValueError:
-                            max_bal = await conf.wallet_max()
-                            payout = max_bal - wallet
-                    else:
-                        try:
-                            await bank.deposit_credits(user, payout)
-                        except BalanceTooHigh as e:
-                            payout = e.max_bal - await bank.get_balance(user)
-                            await bank.set_balance(user, e.max_bal)
-                    msg.append([bet_type, humanize_number(payout), user.display_name])
+            for user_id, amount in bets[bettype].get(value, {}).items():
+                payout = amount + (amount * payouts[bettype])
+                winners.append([value, payout, user_id])
+                totals[user_id] = totals.get(user_id, 0) + payout
+        if not totals:
+            return []
+        if not await self.walletdisabledcheck(ctx):
+            credited = await self.walletpayout(ctx, totals)
+        else:
+            credited = {}
+            for user_id, total in totals.items():
+                user = ctx.guild.get_member(user_id)
+                if user is None:
+                    credited[user_id] = 0
+                    continue
+                try:
+                    await bank.deposit_credits(user, total)
+                    credited[user_id] = total
+                except BalanceTooHigh as e:
+                    credited[user_id] = max(e.max_balance - await bank.get_balance(user), 0)
+                    await bank.set_balance(user, e.max_balance)
+        msg = []
+        for row in winners:
+            # A capped user's credit is shared out over their bets in order, the later ones
+            # showing what was actually left to pay.
+            user_id = row[2]
+            payout = min(row[1], credited[user_id])
+            credited[user_id] -= payout
+            user = ctx.guild.get_member(user_id)
+            name = user.display_name if user is not None else str(user_id)
+            msg.append([row[0], humanize_number(payout), name])
         return msg
 
     @commands.group(invoke_without_command=True)
@@ -213,8 +184,7 @@ class Roulette(MixinMeta):
             )
         if self.roulettegames[ctx.guild.id]["started"]:
             return await ctx.send("The wheel is already spinning.")
-        conf = await self.configglobalcheck(ctx)
-        betting = await conf.betting()
+        betting = (await self.settingsnapshot(ctx))["betting"]
         minbet, maxbet = betting["min"], betting["max"]
         if minbet != -1:
             if amount < minbet:
@@ -234,20 +204,12 @@ class Roulette(MixinMeta):
     async def roulette_start(self, ctx):
         """Start a game of roulette."""
         if ctx.guild.id not in self.roulettegames:
-            self.roulettegames[ctx.guild.id] = {
-                "zero": [],
-                "color": [],
-                "single": [],
-                "dozen": [],
-                "odd_or_even": [],
-                "halfs": [],
-                "column": [],
-                "started": False,
-            }
+            # Bets are kept per bet type as {choice: {user id: amount}}.
+            self.roulettegames[ctx.guild.id] = {bettype: {} for bettype in BET_BUCKETS}
+            self.roulettegames[ctx.guild.id]["started"] = False
         else:
             return await ctx.send("There is already a roulette game on.")
-        conf = await self.configglobalcheck(ctx)
-        time = await conf.roulette_time()
+        time = (await self.settingsnapshot(ctx))["roulette_time"]
         await ctx.send(
             "The roulette wheel will be spun in {} seconds.".format(time), delete_after=time
         )
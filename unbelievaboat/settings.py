@@ -226,10 +226,8 @@ class SettingsMixin(MixinMeta):
     @commands.guild_only()
     async def cooldowns(self, ctx):
         """List your remaining cooldowns.."""
-        conf = await self.configglobalcheck(ctx)
-        userconf = await self.configglobalcheckuser(ctx.author)
-        cd = await userconf.cooldowns()
-        jobcd = await conf.cooldowns()
+        cd = await self.cooldown_store.get(await self.accountkey(ctx.author))
+        jobcd = (await self.settingsnapshot(ctx))["cooldowns"]
         if cd["workcd"] is None:
             workcd = "None"
         else:
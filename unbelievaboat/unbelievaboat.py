@@ -1,9 +1,9 @@
-import datetime
+import asyncio
 import logging
 import random
 from abc import ABC
 from io import BytesIO
-from typing import Literal, Optional
+from typing import Any, Dict, Literal, Mapping, Optional
 
 import discord
 import tabulate
@@ -12,14 +12,18 @@ from redbot.core.errors import BalanceTooHigh
 from redbot.core.utils.chat_formatting import humanize_number, humanize_timedelta, pagify
 
 from .checks import check_global_setting_admin, wallet_disabled_check
+from .cooldowns import CooldownStore
 from .defaultreplies import crimes, work
-from .functions import roll
+from .functions import freeze, roll
+from .ledger import Key, WalletLedger, flush_accounts
 from .roulette import Roulette
 from .settings import SettingsMixin
 from .wallet import Wallet
 
 log = logging.getLogger("red.flare.unbelievaboat")
 
+FLUSH_INTERVAL = 30
+
 
 class CompositeMetaClass(type(commands.Cog), type(ABC)):
     """This allows the metaclass used for proper type detection to coexist with discord.py's
@@ -29,7 +33,7 @@ class CompositeMetaClass(type(commands.Cog), type(ABC)):
 class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=CompositeMetaClass):
     """Unbelievaboat Commands."""
 
-    __version__ = "0.5.10"
+    __version__ = "0.6.0"
 
     def format_help_for_context(self, ctx):
         """Thanks Sinbad."""
@@ -87,8 +91,33 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
         self.config.register_guild(**defaults)
         self.config.register_member(**defaults_member)
         self.config.register_user(**defaults_member)
+        self.settings_cache: Dict[int, Mapping[str, Any]] = {}
+        self.ledger = WalletLedger(self.config)
+        self.cooldown_store = CooldownStore(self.config)
+        self.flush_task = asyncio.create_task(self.flush_loop())
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flushaccounts()
+
+    async def cog_unload(self):
+        self.flush_task.cancel()
+        await asyncio.gather(self.flush_task, return_exceptions=True)
+        await self.flushaccounts()
+
+    async def flushaccounts(self):
+        """Save the changed wallets and cooldowns, both in the same write per scope."""
+        await flush_accounts(self.config, self.ledger.write_lock, self.ledger, self.cooldown_store)
+        self.cooldown_store.evict()
+
+    async def cog_after_invoke(self, ctx):
+        root = ctx.command.root_parent or ctx.command
+        if root.name in ("unbset", "rouletteset"):
+            self.settings_cache.pop(0 if await bank.is_global() else ctx.guild.id, None)
 
     async def red_get_data_for_user(self, *, user_id: int):
+        await self.flushaccounts()
         data = await self.config.user_from_id(user_id).all()
         all_members = await self.config.all_members()
         wallets = []
@@ -109,44 +138,54 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
         requester: Literal["discord_deleted_user", "owner", "user", "user_strict"],
         user_id: int,
     ):
-        await self.config.user_from_id(user_id).clear()
-        all_members = await self.config.all_members()
-        for guild_id, member_dict in all_members.items():
-            if user_id in member_dict:
-                await self.config.member_from_ids(guild_id, user_id).clear()
+        async with self.ledger.write_lock:
+            await self.config.user_from_id(user_id).clear()
+            self.ledger.forget(user_id)
+            self.cooldown_store.forget(user_id)
+            all_members = await self.config.all_members()
+            for guild_id, member_dict in all_members.items():
+                if user_id in member_dict:
+                    await self.config.member_from_ids(guild_id, user_id).clear()
 
     async def configglobalcheck(self, ctx):
         return self.config if await bank.is_global() else self.config.guild(ctx.guild)
 
+    async def settingsnapshot(self, ctx) -> Mapping[str, Any]:
+        """Read-only settings of the guild, or the global ones when the bank is global.
+
+        Cached until one of the settings commands runs.
+        """
+        scope = 0 if await bank.is_global() else ctx.guild.id
+        snapshot = self.settings_cache.get(scope)
+        if snapshot is None:
+            conf = self.config if scope == 0 else self.config.guild(ctx.guild)
+            snapshot = self.settings_cache[scope] = freeze(await conf.all())
+        return snapshot
+
     async def configglobalcheckuser(self, user):
         if await bank.is_global():
             return self.config.user(user)
         return self.config.member(user)
 
+    async def accountkey(self, user) -> Key:
+        return (0 if await bank.is_global() else user.guild.id, user.id)
+
     async def cdcheck(self, ctx, job):
-        conf = await self.configglobalcheck(ctx)
-        userconf = await self.configglobalcheckuser(ctx.author)
-        cd = await userconf.cooldowns()
-        jobcd = await conf.cooldowns()
-        if cd[job] is None:
-            async with userconf.cooldowns() as cd:
-                cd[job] = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
-            return True
-        time = int(datetime.datetime.now(datetime.timezone.utc).timestamp()) - cd[job]
-        if time < jobcd[job]:
-            return (False, humanize_timedelta(seconds=jobcd[job] - time))
-        async with userconf.cooldowns() as cd:
-            cd[job] = int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        jobcd = (await self.settingsnapshot(ctx))["cooldowns"]
+        remaining = await self.cooldown_store.check(
+            await self.accountkey(ctx.author), job, jobcd[job]
+        )
+        if remaining is not None:
+            return (False, humanize_timedelta(seconds=remaining))
         return True
 
     async def fine(self, ctx, job):
-        conf = await self.configglobalcheck(ctx)
-        fines = await conf.fines()
+        fines = (await self.settingsnapshot(ctx))["fines"]
+        currency = await bank.get_currency_name(ctx.guild)
         randint = random.randint(fines["min"], fines["max"])
-        amount = str(humanize_number(randint)) + " " + await bank.get_currency_name(ctx.guild)
-        userconf = await self.configglobalcheckuser(ctx.author)
+        amount = str(humanize_number(randint)) + " " + currency
         if not await self.walletdisabledcheck(ctx):
-            if randint < await userconf.wallet():
+            if randint < await self.walletbalance(ctx.author):
                 await self.walletremove(ctx.author, randint)
                 embed = discord.Embed(
                     colour=discord.Color.red(),
@@ -161,7 +200,7 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
                     await bank.withdraw_credits(ctx.author, fee)
                     embed = discord.Embed(
                         colour=discord.Color.red(),
-                        description=f"\N{NEGATIVE SQUARED CROSS MARK} You were caught by the police and fined {amount}. You did not have enough cash in your wallet and thus it was taken from your bank with a {interestfee}% interest fee ({fee} {await bank.get_currency_name(ctx.guild)}).",
+                        description=f"\N{NEGATIVE SQUARED CROSS MARK} You were caught by the police and fined {amount}. You did not have enough cash in your wallet and thus it was taken from your bank with a {interestfee}% interest fee ({fee} {currency}).",
                     )
                 else:
                     await bank.set_balance(ctx.author, 0)
@@ -280,16 +319,17 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
         if isinstance(cdcheck, tuple):
             embed = await self.cdnotice(ctx.author, cdcheck[1], "work")
             return await ctx.send(embed=embed)
-        conf = await self.configglobalcheck(ctx)
-        payouts = await conf.payouts()
+        settings = await self.settingsnapshot(ctx)
+        currency = await bank.get_currency_name(ctx.guild)
+        payouts = settings["payouts"]
         wage = random.randint(payouts["work"]["min"], payouts["work"]["max"])
-        wagesentence = str(humanize_number(wage)) + " " + await bank.get_currency_name(ctx.guild)
-        if await conf.defaultreplies():
+        wagesentence = str(humanize_number(wage)) + " " + currency
+        if settings["defaultreplies"]:
             job = random.choice(work)
             line = job.format(amount=wagesentence)
             linenum = work.index(job)
         else:
-            replies = await conf.replies()
+            replies = settings["replies"]
             if not replies["workreplies"]:
                 return await ctx.send(
                     "You have custom replies enabled yet haven't added any replies yet."
@@ -306,13 +346,17 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
             try:
                 await self.walletdeposit(ctx, ctx.author, wage)
             except ValueError:
-                embed.description += f"\nYou've reached the maximum amount of {await bank.get_currency_name(ctx.guild)}s in your wallet!"
+                embed.description += (
+                    f"\nYou've reached the maximum amount of {currency}s in your wallet!"
+                )
         else:
             try:
                 await bank.deposit_credits(ctx.author, wage)
             except BalanceTooHigh as e:
                 await bank.set_balance(ctx.author, e.max_balance)
-                embed.description += f"\nYou've reached the maximum amount of {await bank.get_currency_name(ctx.guild)}s in your bank!"
+                embed.description += (
+                    f"\nYou've reached the maximum amount of {currency}s in your bank!"
+                )
 
         await ctx.send(embed=embed)
 
@@ -327,20 +371,20 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
         if isinstance(cdcheck, tuple):
             embed = await self.cdnotice(ctx.author, cdcheck[1], "crime")
             return await ctx.send(embed=embed)
-        conf = await self.configglobalcheck(ctx)
-        failrates = await conf.failrates()
+        settings = await self.settingsnapshot(ctx)
         fail = random.randint(1, 100)
-        if fail < failrates["crime"]:
+        if fail < settings["failrates"]["crime"]:
             return await self.fine(ctx, "crime")
-        payouts = await conf.payouts()
+        currency = await bank.get_currency_name(ctx.guild)
+        payouts = settings["payouts"]
         wage = random.randint(payouts["crime"]["min"], payouts["crime"]["max"])
-        wagesentence = str(humanize_number(wage)) + " " + await bank.get_currency_name(ctx.guild)
-        if await conf.defaultreplies():
+        wagesentence = str(humanize_number(wage)) + " " + currency
+        if settings["defaultreplies"]:
             job = random.choice(crimes)
             line = job.format(amount=wagesentence)
             linenum = crimes.index(job)
         else:
-            replies = await conf.replies()
+            replies = settings["replies"]
             if not replies["crimereplies"]:
                 return await ctx.send(
                     "You have custom replies enabled yet haven't added any replies yet."
@@ -357,13 +401,17 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
             try:
                 await self.walletdeposit(ctx, ctx.author, wage)
             except ValueError:
-                embed.description += f"\nYou've reached the maximum amount of {await bank.get_currency_name(ctx.guild)}s in your wallet!"
+                embed.description += (
+                    f"\nYou've reached the maximum amount of {currency}s in your wallet!"
+                )
         else:
             try:
                 await bank.deposit_credits(ctx.author, wage)
             except BalanceTooHigh as e:
                 await bank.set_balance(ctx.author, e.max_balance)
-                embed.description += f"\nYou've reached the maximum amount of {await bank.get_currency_name(ctx.guild)}s in your bank!"
+                embed.description += (
+                    f"\nYou've reached the maximum amount of {currency}s in your bank!"
+                )
         await ctx.send(embed=embed)
 
     @commands.command()
@@ -380,10 +428,8 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
         if isinstance(cdcheck, tuple):
             embed = await self.cdnotice(ctx.author, cdcheck[1], "rob")
             return await ctx.send(embed=embed)
-        conf = await self.configglobalcheck(ctx)
-        failrates = await conf.failrates()
         fail = random.randint(1, 100)
-        if fail < failrates["rob"]:
+        if fail < (await self.settingsnapshot(ctx))["failrates"]["rob"]:
             return await self.fine(ctx, "rob")
         userbalance = await self.walletbalance(user)
         if userbalance <= 50:
@@ -405,10 +451,7 @@ class Unbelievaboat(Wallet, Roulette, SettingsMixin, commands.Cog, metaclass=Com
             timestamp=ctx.message.created_at,
         )
         embed.set_author(name=ctx.author, icon_url=ctx.author.display_avatar)
-        try:
-            await self.walletdeposit(ctx, ctx.author, stolen)
-            await self.walletremove(user, stolen)
-        except ValueError:
+        if await self.wallettransfer(ctx, user, ctx.author, stolen) < stolen:
             embed.description += "\nAfter stealing the cash, you notice your wallet is now full!"
 
         await ctx.send(embed=embed)
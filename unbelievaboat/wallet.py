@@ -1,4 +1,5 @@
-from typing import Union
+from itertools import islice
+from typing import Dict, Union
 
 import discord
 from redbot.core import bank, commands
@@ -14,79 +15,95 @@ class Wallet(MixinMeta):
     """Wallet Commands."""
 
     async def walletdisabledcheck(self, ctx):
-        if await bank.is_global():
-            return not await self.config.disable_wallet()
-        return not await self.config.guild(ctx.guild).disable_wallet()
+        return not (await self.settingsnapshot(ctx))["disable_wallet"]
 
     async def walletdeposit(self, ctx, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        main_conf = await self.configglobalcheck(ctx)
-        wallet = await conf.wallet()
-        max_bal = await main_conf.wallet_max()
-        amount = wallet + amount
-        if amount <= max_bal:
-            await conf.wallet.set(amount)
-        else:
-            await conf.wallet.set(max_bal)
-            raise ValueError
+        max_bal = (await self.settingsnapshot(ctx))["wallet_max"]
+        async with self.ledger.account(await self.accountkey(user)) as account:
+            account.balance += amount
+            if account.balance > max_bal:
+                account.balance = max_bal
+                raise ValueError
 
     async def walletremove(self, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        wallet = await conf.wallet()
-        if amount < wallet:
-            await conf.wallet.set(wallet - amount)
-        else:
-            await conf.wallet.set(0)
+        async with self.ledger.account(await self.accountkey(user)) as account:
+            account.balance = max(account.balance - amount, 0)
 
     async def walletwithdraw(self, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        wallet = await conf.wallet()
-        if amount < wallet:
-            await conf.wallet.set(wallet - amount)
-        else:
-            raise ValueError
+        async with self.ledger.account(await self.accountkey(user)) as account:
+            if amount >= account.balance:
+                raise ValueError
+            account.balance -= amount
 
     async def walletset(self, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        await conf.wallet.set(amount)
+        async with self.ledger.account(await self.accountkey(user)) as account:
+            account.balance = amount
+
+    async def wallettransfer(self, ctx, payer, payee, amount) -> int:
+        """Move up to ``amount`` from one wallet to another in a single atomic step.
+
+        Returns the amount moved, which is less than asked when the payer can't cover it or
+        the payee's wallet would go above the max balance.
+        """
+        max_bal = (await self.settingsnapshot(ctx))["wallet_max"]
+        async with self.ledger.accounts(
+            await self.accountkey(payer), await self.accountkey(payee)
+        ) as (source, target):
+            amount = max(min(amount, source.balance, max_bal - target.balance), 0)
+            source.balance -= amount
+            target.balance += amount
+        return amount
+
+    async def walletpayout(self, ctx, amounts: Dict[int, int]) -> Dict[int, int]:
+        """Credit several wallets of the guild, by user id, under a single set of locks.
+
+        Returns the amount credited to each user, which is less than asked for wallets that
+        would go above the max balance.
+        """
+        max_bal = (await self.settingsnapshot(ctx))["wallet_max"]
+        scope = 0 if await bank.is_global() else ctx.guild.id
+        credited = {}
+        async with self.ledger.accounts(*((scope, user_id) for user_id in amounts)) as accounts:
+            for account in accounts:
+                amount = max(min(amounts[account.key[1]], max_bal - account.balance), 0)
+                account.balance += amount
+                credited[account.key[1]] = amount
+        return credited
 
     async def bankdeposit(self, ctx, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        wallet = await conf.wallet()
         deposit = abs(amount)
-        if deposit > wallet:
-            return await ctx.send("You have insufficent funds to complete this deposit.")
-        try:
-            await bank.deposit_credits(user, deposit)
-            msg = f"You have succesfully deposited {deposit} {await bank.get_currency_name(ctx.guild)} into your bank account."
-        except BalanceTooHigh as e:
-            deposit = e.max_balance - await bank.get_balance(user)
-            await bank.deposit_credits(user, deposit)
-            msg = f"Your transaction was limited to {deposit} {e.currency_name} as your bank account has reached the max balance."
-        await self.walletset(user, wallet - deposit)
+        async with self.ledger.account(await self.accountkey(user), save=True) as account:
+            if deposit > account.balance:
+                return await ctx.send("You have insufficent funds to complete this deposit.")
+            try:
+                await bank.deposit_credits(user, deposit)
+                msg = f"You have succesfully deposited {deposit} {await bank.get_currency_name(ctx.guild)} into your bank account."
+            except BalanceTooHigh as e:
+                deposit = e.max_balance - await bank.get_balance(user)
+                await bank.deposit_credits(user, deposit)
+                msg = f"Your transaction was limited to {deposit} {e.currency_name} as your bank account has reached the max balance."
+            account.balance -= deposit
         return await ctx.send(msg)
 
     async def walletbalance(self, user):
-        conf = await self.configglobalcheckuser(user)
-        return await conf.wallet()
+        return await self.ledger.balance(await self.accountkey(user))
 
     async def bankwithdraw(self, ctx, user, amount):
-        conf = await self.configglobalcheckuser(user)
-        mainconf = await self.configglobalcheck(ctx)
-        max_bal = await mainconf.wallet_max()
-        wallet = await conf.wallet()
-        try:
-            if wallet + amount > max_bal:
-                return await ctx.send(
-                    f"You have attempted to withdraw more cash than the maximum balance allows. The maximum balance is {humanize_number(max_bal)} {await bank.get_currency_name(ctx.guild)}."
-                )
-            await bank.withdraw_credits(user, amount)
-            await self.walletset(user, wallet + amount)
-            return await ctx.send(
-                f"You have succesfully withdrawn {humanize_number(amount)} {await bank.get_currency_name(ctx.guild)} from your bank account."
-            )
-        except ValueError:
-            return await ctx.send("You have insufficent funds to complete this withdrawal.")
+        max_bal = (await self.settingsnapshot(ctx))["wallet_max"]
+        currency = await bank.get_currency_name(ctx.guild)
+        async with self.ledger.account(await self.accountkey(user), save=True) as account:
+            try:
+                if account.balance + amount > max_bal:
+                    return await ctx.send(
+                        f"You have attempted to withdraw more cash than the maximum balance allows. The maximum balance is {humanize_number(max_bal)} {currency}."
+                    )
+                await bank.withdraw_credits(user, amount)
+                account.balance += amount
+            except ValueError:
+                return await ctx.send("You have insufficent funds to complete this withdrawal.")
+        return await ctx.send(
+            f"You have succesfully withdrawn {humanize_number(amount)} {currency} from your bank account."
+        )
 
     @commands.group()
     @wallet_disabled_check()
@@ -105,9 +122,12 @@ class Wallet(MixinMeta):
             user = ctx.author
         balance = await self.walletbalance(user)
         currency = await bank.get_currency_name(ctx.guild)
-        await ctx.send(
-            f"{user.display_name}'s wallet balance is {humanize_number(balance)} {currency}"
-        )
+        scope, user_id = await self.accountkey(user)
+        rank = (await self.ledger.leaderboard(scope)).rank(user_id)
+        msg = f"{user.display_name}'s wallet balance is {humanize_number(balance)} {currency}"
+        if rank is not None:
+            msg += f" (#{humanize_number(rank)} {'globally' if scope == 0 else 'in this server'})"
+        await ctx.send(msg)
 
     @wallet.command()
     @commands.guild_only()
@@ -117,17 +137,13 @@ class Wallet(MixinMeta):
             top = 10
         guild = ctx.guild
         if await bank.is_global():
-            raw_accounts = await self.config.all_users()
-            if guild is not None:
-                tmp = raw_accounts.copy()
-                for acc in tmp:
-                    if not guild.get_member(acc):
-                        del raw_accounts[acc]
+            board = await self.ledger.leaderboard(0)
+            accounts = (acc for acc in board if guild.get_member(acc[0]))
         else:
-            raw_accounts = await self.config.all_members(guild)
-        walletlist = sorted(raw_accounts.items(), key=lambda x: x[1]["wallet"], reverse=True)[:top]
+            accounts = iter(await self.ledger.leaderboard(guild.id))
+        walletlist = list(islice(accounts, top))
         try:
-            bal_len = len(str(walletlist[0][1]["wallet"]))
+            bal_len = len(str(walletlist[0][1]))
 
         except IndexError:
             return await ctx.send("There are no users with a wallet balance.")
@@ -144,7 +160,7 @@ class Wallet(MixinMeta):
             except AttributeError:
                 user_id = f"({acc[0]})" if await ctx.bot.is_owner(ctx.author) else ""
                 name = f"{user_id}"
-            balance = acc[1]["wallet"]
+            balance = acc[1]
 
             if acc[0] != ctx.author.id:
                 temp_msg += f"{pos}. {balance: <{bal_len + 5}} {name}\n"
@@ -168,15 +184,15 @@ class Wallet(MixinMeta):
     @wallet.command(name="set")
     async def _walletset(self, ctx, user: discord.Member, amount: int):
         """Set a users wallet balance."""
-        conf = await self.configglobalcheck(ctx)
-        maxw = await conf.wallet_max()
+        maxw = (await self.settingsnapshot(ctx))["wallet_max"]
+        currency = await bank.get_currency_name(ctx.guild)
         if amount > maxw:
             return await ctx.send(
-                f"{user.display_name}'s wallet balance cannot rise above {humanize_number(maxw)} {await bank.get_currency_name(ctx.guild)}."
+                f"{user.display_name}'s wallet balance cannot rise above {humanize_number(maxw)} {currency}."
             )
         await self.walletset(user, amount)
         await ctx.send(
-            f"{ctx.author.display_name} has set {user.display_name}'s wallet balance to {humanize_number(amount)} {await bank.get_currency_name(ctx.guild)}."
+            f"{ctx.author.display_name} has set {user.display_name}'s wallet balance to {humanize_number(amount)} {currency}."
         )
 
     @commands.command()